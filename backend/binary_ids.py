@@ -0,0 +1,181 @@
+"""
+Compact storage of UUID ids as BSON Binary subtype 4.
+
+The API keeps ids as canonical UUID strings. With BINARY_IDS enabled the mongo
+engine stores them as 16-byte Binary subtype 4 values instead of 36-character
+strings, which shrinks every document, the unique id indexes and the compound
+indexes ending in id, and every game embedded in a series.
+
+Conversion happens at the collection boundary, so the routes are unchanged:
+
+- Writes, filters and projections: BinaryIdCollection rewrites every value
+  under a key named "id" (or a dotted path ending in ".id", e.g. "games.id")
+  that is a canonical lowercase UUID string, including operator arguments
+  such as $in and $gt. Other strings are left alone, so ids that are not
+  UUIDs keep working and round-trip unchanged.
+- Reads: ID_TYPE_REGISTRY, installed on the client, decodes Binary subtype 4
+  back into the string while PyMongo decodes the BSON, without a second pass
+  over the documents. It is harmless for string ids, so the mongo engine
+  always uses it and can read either form.
+
+Binary subtype 4 values compare byte-wise, which for UUIDs is the order of
+their strings, so keyset paging by id keeps its order. Existing documents are
+converted by migrations/convert_ids.py.
+"""
+
+import uuid
+
+from bson.binary import Binary, UUID_SUBTYPE
+from bson.codec_options import TypeDecoder, TypeRegistry
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+
+
+def to_binary(value):
+    """Binary subtype 4 for a canonical UUID string; anything else unchanged."""
+    if not isinstance(value, str) or len(value) != 36:
+        return value
+    try:
+        parsed = uuid.UUID(value)
+    except ValueError:
+        return value
+    if str(parsed) != value:
+        return value
+    return Binary(parsed.bytes, UUID_SUBTYPE)
+
+
+def from_binary(value):
+    """The UUID string for a Binary subtype 4; anything else unchanged."""
+    if isinstance(value, Binary) and value.subtype == UUID_SUBTYPE:
+        return str(uuid.UUID(bytes=bytes(value)))
+    return value
+
+
+class _UUIDStringDecoder(TypeDecoder):
+    bson_type = Binary
+
+    def transform_bson(self, value):
+        return from_binary(value)
+
+
+ID_TYPE_REGISTRY = TypeRegistry([_UUIDStringDecoder()])
+
+
+def _is_id_key(key: str) -> bool:
+    return key == "id" or key.endswith(".id")
+
+
+def _encode_id_value(value):
+    if isinstance(value, str):
+        return to_binary(value)
+    if isinstance(value, list):
+        return [_encode_id_value(v) for v in value]
+    if isinstance(value, dict):
+        # Operators on the id ({"$in": [...]}, {"$gt": ...}); $exists and the like pass through
+        return {k: _encode_id_value(v) for k, v in value.items()}
+    return value
+
+
+def encode_ids(value):
+    """Copy of a filter, update, document or pipeline with its UUID id strings as Binary."""
+    if isinstance(value, dict):
+        return {k: _encode_id_value(v) if _is_id_key(k) else encode_ids(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode_ids(v) for v in value]
+    return value
+
+
+def _encode_request(request):
+    """Rebuild a bulk_write request with encoded ids (the classes expose no public accessors)."""
+    if isinstance(request, InsertOne):
+        return InsertOne(encode_ids(request._doc))
+    if isinstance(request, (UpdateOne, UpdateMany)):
+        return type(request)(
+            encode_ids(request._filter), encode_ids(request._doc), upsert=request._upsert,
+            collation=request._collation, array_filters=request._array_filters, hint=request._hint,
+        )
+    if isinstance(request, ReplaceOne):
+        return ReplaceOne(
+            encode_ids(request._filter), encode_ids(request._doc), upsert=request._upsert,
+            collation=request._collation, hint=request._hint,
+        )
+    if isinstance(request, (DeleteOne, DeleteMany)):
+        return type(request)(encode_ids(request._filter), collation=request._collation, hint=request._hint)
+    return request
+
+
+class BinaryIdCollection:
+    """A Motor collection whose filters and written documents get Binary ids.
+
+    Methods not listed here (create_index, drop, watch, name, ...) are the
+    wrapped collection's own.
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def find(self, filter=None, projection=None, *args, **kwargs):
+        return self._collection.find(encode_ids(filter), encode_ids(projection), *args, **kwargs)
+
+    async def find_one(self, filter=None, projection=None, *args, **kwargs):
+        return await self._collection.find_one(encode_ids(filter), encode_ids(projection), *args, **kwargs)
+
+    async def count_documents(self, filter, **kwargs):
+        return await self._collection.count_documents(encode_ids(filter), **kwargs)
+
+    async def insert_one(self, document, **kwargs):
+        return await self._collection.insert_one(encode_ids(document), **kwargs)
+
+    async def insert_many(self, documents, **kwargs):
+        return await self._collection.insert_many([encode_ids(d) for d in documents], **kwargs)
+
+    async def update_one(self, filter, update, **kwargs):
+        return await self._collection.update_one(encode_ids(filter), encode_ids(update), **kwargs)
+
+    async def update_many(self, filter, update, **kwargs):
+        return await self._collection.update_many(encode_ids(filter), encode_ids(update), **kwargs)
+
+    async def replace_one(self, filter, replacement, **kwargs):
+        return await self._collection.replace_one(encode_ids(filter), encode_ids(replacement), **kwargs)
+
+    async def find_one_and_update(self, filter, update, projection=None, *args, **kwargs):
+        return await self._collection.find_one_and_update(
+            encode_ids(filter), encode_ids(update), encode_ids(projection), *args, **kwargs
+        )
+
+    async def find_one_and_delete(self, filter, projection=None, *args, **kwargs):
+        return await self._collection.find_one_and_delete(encode_ids(filter), encode_ids(projection), *args, **kwargs)
+
+    async def delete_one(self, filter, **kwargs):
+        return await self._collection.delete_one(encode_ids(filter), **kwargs)
+
+    async def delete_many(self, filter, **kwargs):
+        return await self._collection.delete_many(encode_ids(filter), **kwargs)
+
+    async def bulk_write(self, requests, **kwargs):
+        return await self._collection.bulk_write([_encode_request(r) for r in requests], **kwargs)
+
+    def aggregate(self, pipeline, *args, **kwargs):
+        return self._collection.aggregate(encode_ids(pipeline), *args, **kwargs)
+
+
+class BinaryIdDatabase:
+    """A Motor database handing out BinaryIdCollection wrappers."""
+
+    def __init__(self, database):
+        self._database = database
+        self._collections = {}
+
+    def __getitem__(self, name: str) -> BinaryIdCollection:
+        if name not in self._collections:
+            self._collections[name] = BinaryIdCollection(self._database[name])
+        return self._collections[name]
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if hasattr(type(self._database), name):
+            return getattr(self._database, name)
+        return self[name]
@@ -0,0 +1,267 @@
+"""
+Negotiated response compression (zstd, brotli, gzip).
+
+The encoding is picked from the client's Accept-Encoding q-values, ties going
+to the server's order (zstd, br, gzip); zstd and brotli are offered only when
+the zstandard / brotli packages are installed, gzip always. Complete bodies
+below the minimum size, responses that already carry a Content-Encoding (the
+export route's ?gzip=true), event streams and non-text types pass through
+untouched. Streamed bodies are compressed chunk by chunk. A strong ETag on a
+compressed response, or on a 304 to a client that accepts compression, is
+made weak: it names the identity bytes, and strong validators must differ
+between content-codings.
+
+Compressed bodies are kept in a size-bounded LRU keyed by encoding and a
+digest of the uncompressed bytes, so a hot list or document that is served
+over and over is compressed once: hashing is an order of magnitude cheaper
+than compressing. Large bodies are compressed on a worker thread (the codecs
+release the GIL) to keep the event loop responsive.
+"""
+
+import asyncio
+import hashlib
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from metrics import registry
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+UNCOMPRESSIBLE_TYPES = ("text/event-stream",)
+# Bodies at least this large are compressed off the event loop
+THREAD_MIN_SIZE = 256 * 1024
+
+compressed_responses_total = registry.counter(
+    "http_compressed_responses_total", "Responses sent compressed, by encoding.", ("encoding",),
+)
+compression_bytes_total = registry.counter(
+    "http_compression_bytes_total", "Body bytes before and after compression, by encoding.",
+    ("encoding", "stage"),
+)
+
+
+class _Brotli:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+def available_encodings() -> tuple:
+    """Supported encodings in server preference order."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return tuple(encodings)
+
+
+def compressor(encoding: str, level: int):
+    """A streaming compressor with compress() and flush()."""
+    if encoding == "gzip":
+        return zlib.compressobj(level, zlib.DEFLATED, 31)
+    if encoding == "br":
+        return _Brotli(level)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compressobj()
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    c = compressor(encoding, level)
+    return c.compress(data) + c.flush()
+
+
+def negotiate(accept_encoding: Optional[str], encodings: tuple) -> Optional[str]:
+    """The acceptable encoding with the highest q-value, or None for identity."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        token, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if token:
+            weights[token.lower()] = q
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressedCache:
+    """LRU of compressed bodies keyed by (encoding, digest of the uncompressed body), bounded in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, bytes]" = OrderedDict()
+
+    @staticmethod
+    def key(encoding: str, body: bytes) -> tuple:
+        return encoding, hashlib.blake2b(body, digest_size=16).digest()
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        data = self._entries.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def put(self, key: tuple, data: bytes):
+        if len(data) > self.max_bytes or key in self._entries:
+            return
+        self._entries[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+
+def _weaken_etag(headers: MutableHeaders):
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = "W/" + etag
+
+
+def _compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").lower()
+    if content_type.startswith(UNCOMPRESSIBLE_TYPES):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing response bodies with the negotiated encoding.
+
+    `levels` maps each encoding to its compression level; `cache` may be None
+    to compress every time.
+    """
+
+    def __init__(self, app, minimum_size: int, levels: Dict[str, int], cache: Optional[CompressedCache] = None,
+                 enabled: bool = True):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = levels
+        self.cache = cache
+        self.enabled = enabled
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope, receive, send):
+        encoding = None
+        if self.enabled and scope["type"] == "http":
+            encoding = negotiate(Headers(scope=scope).get("accept-encoding"), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self, encoding, send).run(scope, receive)
+
+    async def compress_body(self, body: bytes, encoding: str) -> bytes:
+        key = self.cache.key(encoding, body) if self.cache is not None else None
+        data = self.cache.get(key) if key is not None else None
+        if data is None:
+            level = self.levels[encoding]
+            if len(body) >= THREAD_MIN_SIZE:
+                data = await asyncio.to_thread(compress, body, encoding, level)
+            else:
+                data = compress(body, encoding, level)
+            if key is not None:
+                self.cache.put(key, data)
+        return data
+
+
+class _CompressedResponder:
+    """Rewrites one response: holds back the start message until the first body chunk decides."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start = None
+        self.active = None  # None until the first body message, then whether to compress
+        self.stream = None
+
+    async def run(self, scope, receive):
+        await self.middleware.app(scope, receive, self.wrapped_send)
+
+    def _mark_compressed(self, headers: MutableHeaders):
+        headers["Content-Encoding"] = self.encoding
+        _weaken_etag(headers)
+        headers.add_vary_header("Accept-Encoding")
+        compressed_responses_total.inc(self.encoding)
+
+    async def wrapped_send(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+        if self.active is None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            self.active = _compressible(headers) and (more or len(body) >= self.middleware.minimum_size)
+            if not self.active:
+                if _compressible(headers):
+                    headers.add_vary_header("Accept-Encoding")
+                elif self.start["status"] == 304:
+                    _weaken_etag(headers)
+                await self.send(self.start)
+                await self.send(message)
+                return
+            self._mark_compressed(headers)
+            if not more:
+                data = await self.middleware.compress_body(body, self.encoding)
+                self._count(len(body), len(data))
+                headers["Content-Length"] = str(len(data))
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": data})
+                return
+            del headers["Content-Length"]
+            self.stream = compressor(self.encoding, self.middleware.levels[self.encoding])
+            await self.send(self.start)
+        if not self.active:
+            await self.send(message)
+            return
+        data = self.stream.compress(body)
+        if not more:
+            data += self.stream.flush()
+        self._count(len(body), len(data))
+        if data or not more:
+            await self.send({"type": "http.response.body", "body": data, "more_body": more})
+
+    def _count(self, before: int, after: int):
+        compression_bytes_total.inc(self.encoding, "uncompressed", amount=before)
+        compression_bytes_total.inc(self.encoding, "compressed", amount=after)
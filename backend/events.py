@@ -0,0 +1,154 @@
+"""
+Collection change events for the /api/events Server-Sent Events stream.
+
+One EventHub per process fans events out to any number of SSE subscribers.
+Each subscriber has its own bounded queue; a client that falls behind has
+its backlog replaced by a single "resync" event (refetch everything) instead
+of slowing down the hub or growing memory.
+
+Events come from one shared MongoDB change stream per collection when the
+deployment supports them (replica sets and sharded clusters). Otherwise -
+a standalone mongod or the local storage engines - the write handlers
+publish into the hub directly, which covers writes made by this process.
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Iterable, Optional
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from metrics import registry
+
+logger = logging.getLogger("events")
+
+WATCH_RETRY_SECONDS = 5.0
+
+events_published_total = registry.counter(
+    "events_published_total", "Change events published to SSE subscribers, by source.", ("source",),
+)
+events_dropped_total = registry.counter(
+    "events_dropped_total", "SSE subscriber backlogs dropped because the client fell behind.",
+)
+
+
+class Subscription:
+    def __init__(self, collections: Optional[set], maxsize: int):
+        self.collections = collections
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    def offer(self, event: dict):
+        if self.collections and event["collection"] not in self.collections:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.resync()
+            events_dropped_total.inc()
+
+    def resync(self):
+        """Replace the backlog with one event telling the client to refetch."""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait({"type": "resync"})
+
+
+class EventHub:
+    """Fan-out of change events to SSE subscribers, fed by change streams or by the write path."""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.source = "local"
+        self._subscribers = set()
+        self._tasks = []
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, collections: Optional[Iterable[str]] = None) -> Subscription:
+        subscription = Subscription(set(collections) if collections else None, self.queue_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+    def publish(self, collection: str, operation: str, ids: Iterable[str], source: str):
+        self._sequence += 1
+        event = {
+            "type": "change",
+            "seq": self._sequence,
+            "collection": collection,
+            "operation": operation,
+            "ids": [i for i in ids if i is not None],
+            "at": datetime.utcnow().isoformat(),
+        }
+        events_published_total.inc(source)
+        for subscription in list(self._subscribers):
+            subscription.offer(event)
+
+    def publish_local(self, collection: str, operation: str, ids: Iterable[str]):
+        """Called by the write path; ignored while change streams deliver the same writes."""
+        if self.source == "local":
+            self.publish(collection, operation, ids, "local")
+
+    async def start(self, db, collections: Iterable[str]):
+        if self._tasks:
+            return
+        if not await change_streams_supported(db):
+            logger.info("Change streams unavailable; publishing events from this process's writes only")
+            return
+        self.source = "change_stream"
+        for name in collections:
+            self._tasks.append(asyncio.get_running_loop().create_task(self._watch(db[name])))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _watch(self, collection):
+        # Only the API-level id is needed; updateLookup fills it in for updates
+        pipeline = [{"$project": {"operationType": 1, "fullDocument.id": 1}}]
+        resume_token = None
+        while True:
+            try:
+                async with collection.watch(
+                    pipeline, full_document="updateLookup", resume_after=resume_token
+                ) as stream:
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        doc_id = (change.get("fullDocument") or {}).get("id")
+                        self.publish(collection.name, change["operationType"], [doc_id], "change_stream")
+            except PyMongoError as e:
+                logger.warning("Change stream on %s failed (%s); retrying", collection.name, e)
+                if isinstance(e, OperationFailure):
+                    # The resume point may be gone from the oplog: start fresh and
+                    # let clients refetch whatever they missed meanwhile
+                    resume_token = None
+                    for subscription in list(self._subscribers):
+                        subscription.resync()
+                await asyncio.sleep(WATCH_RETRY_SECONDS)
+
+
+async def change_streams_supported(db) -> bool:
+    """Change streams need a replica set or a sharded cluster."""
+    for command in ("hello", "isMaster"):  # hello needs MongoDB 4.4.2+
+        try:
+            hello = await db.command(command)
+        except Exception:
+            continue
+        return "setName" in hello or hello.get("msg") == "isdbgrid"
+    return False
+
+
+def format_event(event: dict) -> str:
+    """One SSE frame."""
+    frame = f"event: {event['type']}\n"
+    if "seq" in event:
+        frame += f"id: {event['seq']}\n"
+    return frame + f"data: {json.dumps(event)}\n\n"
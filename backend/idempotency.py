@@ -0,0 +1,246 @@
+"""
+Idempotency-Key support for POST routes.
+
+A client that may retry a create sends an `Idempotency-Key` header (any
+unique string, e.g. a UUID, at most 255 characters). The first request with
+a key claims it and runs; its response (status, headers, body) is stored
+under the key, the method and the path. A retry with the same key and the
+same request gets the stored response back, marked with
+`Idempotent-Replayed: true`, without running the route again. A retry
+while the first request is still running gets 409; reusing a key for a
+different request body gets 422. 5xx responses and exceptions release the
+key so the retry runs for real.
+
+Keys live in a MongoDB collection with a TTL index on created_at (the
+mongo engine) or in process memory (the local engines), for IDEMPOTENCY_TTL.
+A claim whose request never finished (a crashed process) can be taken over
+after PENDING_TIMEOUT. If the store cannot be reached the request runs
+without idempotency rather than failing.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from metrics import registry
+from singleflight import template_pattern
+
+logger = logging.getLogger("idempotency")
+
+HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+PENDING_TIMEOUT = timedelta(seconds=60)
+CLAIM_ATTEMPTS = 3
+
+idempotency_requests_total = registry.counter(
+    "idempotency_requests_total", "POST requests carrying an Idempotency-Key, by outcome.", ("result",),
+)
+
+
+def _expired(record: dict, now: datetime, ttl: timedelta) -> bool:
+    """A finished record past its TTL, or a claim whose request never finished."""
+    limit = ttl if record["state"] == "done" else PENDING_TIMEOUT
+    return record["created_at"] < now - limit
+
+
+def _takes_over(record: dict, fingerprint: str, now: datetime, ttl: timedelta) -> bool:
+    if not _expired(record, now, ttl):
+        return False
+    # An abandoned claim is only retried by the same request; an expired key may be reused freely
+    return record["state"] == "done" or record["fingerprint"] == fingerprint
+
+
+class MemoryIdempotencyStore:
+    """Keys in process memory, for the local storage engines."""
+
+    def __init__(self, ttl: timedelta):
+        self.ttl = ttl
+        self._records = {}
+        self._next_purge = time.monotonic() + ttl.total_seconds()
+
+    async def setup(self):
+        pass
+
+    def _purge(self, now: datetime):
+        if time.monotonic() < self._next_purge:
+            return
+        self._next_purge = time.monotonic() + self.ttl.total_seconds()
+        for key in [key for key, record in self._records.items() if _expired(record, now, self.ttl)]:
+            del self._records[key]
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[dict]:
+        """Claim `key` and return None, or return the record of an earlier request."""
+        now = datetime.utcnow()
+        self._purge(now)
+        record = self._records.get(key)
+        if record is not None and not _takes_over(record, fingerprint, now, self.ttl):
+            return record
+        self._records[key] = {"fingerprint": fingerprint, "state": "pending", "created_at": now}
+        return None
+
+    async def complete(self, key: str, response: dict):
+        record = self._records.get(key)
+        if record is not None:
+            record.update(state="done", response=response)
+
+    async def release(self, key: str):
+        self._records.pop(key, None)
+
+
+class MongoIdempotencyStore:
+    """Keys in a MongoDB collection, shared by all instances; a TTL index removes old ones."""
+
+    def __init__(self, collection, ttl: timedelta):
+        self.collection = collection
+        self.ttl = ttl
+
+    async def setup(self):
+        await self.collection.create_index("created_at", expireAfterSeconds=int(self.ttl.total_seconds()))
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[dict]:
+        """Claim `key` and return None, or return the record of an earlier request."""
+        record = None
+        for _ in range(CLAIM_ATTEMPTS):
+            now = datetime.utcnow()
+            claim = {"_id": key, "fingerprint": fingerprint, "state": "pending", "created_at": now}
+            try:
+                await self.collection.insert_one(claim)
+                return None
+            except DuplicateKeyError:
+                pass
+            record = await self.collection.find_one({"_id": key})
+            if record is None:
+                continue  # expired and removed meanwhile
+            if not _takes_over(record, fingerprint, now, self.ttl):
+                return record
+            # Compare-and-swap on created_at, so only one retry takes the key over
+            result = await self.collection.replace_one({"_id": key, "created_at": record["created_at"]}, claim)
+            if result.modified_count:
+                return None
+        return record or {"fingerprint": fingerprint, "state": "pending"}
+
+    async def complete(self, key: str, response: dict):
+        await self.collection.update_one({"_id": key}, {"$set": {"state": "done", "response": response}})
+
+    async def release(self, key: str):
+        await self.collection.delete_one({"_id": key, "state": "pending"})
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+async def _send_json(send, status: int, detail: str):
+    body = json.dumps({"detail": detail}).encode()
+    await send({"type": "http.response.start", "status": status, "headers": [
+        (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+    ]})
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware honouring Idempotency-Key on POSTs to the given route templates."""
+
+    def __init__(self, app, routes: Iterable[str], store=None):
+        self.app = app
+        self.routes = [(template_pattern(template), template) for template in routes]
+        self.store = store
+
+    def _route(self, scope) -> Optional[str]:
+        if self.store is None or scope["type"] != "http" or scope["method"] != "POST":
+            return None
+        for pattern, template in self.routes:
+            if pattern.match(scope["path"]):
+                return template
+        return None
+
+    async def __call__(self, scope, receive, send):
+        route = self._route(scope)
+        key = dict(scope["headers"]).get(HEADER) if route else None
+        if not key:
+            await self.app(scope, receive, send)
+            return
+        # Metrics label for the responses answered here without reaching the router
+        scope["route_template"] = route
+        if len(key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters")
+            return
+        body = await _read_body(receive)
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        record_key = f"{scope['method']} {scope['path']} {key.decode('latin-1')}"
+        fingerprint = hashlib.sha256(scope.get("query_string", b"") + b"\n" + body).hexdigest()
+        try:
+            record = await self.store.claim(record_key, fingerprint)
+        except Exception as e:
+            logger.warning("Idempotency store unavailable (%s); running request without it", e)
+            idempotency_requests_total.inc("unavailable")
+            await self.app(scope, replay_receive, send)
+            return
+
+        if record is not None:
+            if record["fingerprint"] != fingerprint:
+                idempotency_requests_total.inc("mismatch")
+                await _send_json(send, 422, "Idempotency-Key was already used for a different request")
+            elif record["state"] != "done":
+                idempotency_requests_total.inc("conflict")
+                await _send_json(send, 409, "A request with this Idempotency-Key is still being processed")
+            else:
+                idempotency_requests_total.inc("replayed")
+                response = record["response"]
+                headers = [tuple(header) for header in response["headers"]] + [(b"idempotent-replayed", b"true")]
+                await send({"type": "http.response.start", "status": response["status"], "headers": headers})
+                await send({"type": "http.response.body", "body": response["body"]})
+            return
+
+        start, chunks = None, []
+
+        async def record_send(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, record_send)
+        except BaseException:
+            await self._release(record_key)
+            raise
+        if start is None or start["status"] >= 500:
+            await self._release(record_key)
+            return
+        response = {"status": start["status"], "headers": [list(h) for h in start.get("headers", [])],
+                    "body": b"".join(chunks)}
+        try:
+            await self.store.complete(record_key, response)
+            idempotency_requests_total.inc("stored")
+        except Exception as e:
+            logger.warning("Could not store idempotent response for %s: %s", record_key, e)
+
+    async def _release(self, record_key: str):
+        try:
+            await self.store.release(record_key)
+        except Exception as e:
+            logger.warning("Could not release Idempotency-Key %s: %s", record_key, e)
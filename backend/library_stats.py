@@ -0,0 +1,162 @@
+"""
+Library statistics computed by one MongoDB aggregation.
+
+Standalone games and the games embedded in game series are combined with
+$unionWith (the series side $unwinds its games array), cut down to the few
+fields the statistics need and summarised by a single $facet stage, so only
+the small facet document leaves the server. Engines that cannot run the
+pipeline (the local storage engines, or MongoDB before 4.4) get the same
+facets computed in Python.
+"""
+
+import logging
+from collections import Counter
+
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger("library_stats")
+
+STATS_SOURCE_FIELDS = (
+    "completion_status", "rating", "platinum_status", "trophies_earned", "trophies_total", "minutes_played",
+)
+
+
+def _stats_fields(source: str) -> dict:
+    return {
+        "_id": 0,
+        "source": {"$literal": source},
+        "completion_status": 1,
+        "rating": 1,
+        "platinum_status": {"$ifNull": ["$platinum_status", False]},
+        "trophies_earned": {"$ifNull": ["$trophies_earned", 0]},
+        "trophies_total": {"$ifNull": ["$trophies_total", 0]},
+        "minutes_played": {"$ifNull": ["$minutes_played", 0]},
+    }
+
+
+_HAS_TROPHIES = {"$gt": ["$trophies_total", 0]}
+
+FACETS = {
+    "totals": [{"$group": {
+        "_id": None,
+        "games": {"$sum": 1},
+        "platinum": {"$sum": {"$cond": ["$platinum_status", 1, 0]}},
+        "trophies_earned": {"$sum": "$trophies_earned"},
+        "trophies_total": {"$sum": "$trophies_total"},
+        "with_trophies": {"$sum": {"$cond": [_HAS_TROPHIES, 1, 0]}},
+        "fully_completed": {"$sum": {"$cond": [
+            {"$and": [_HAS_TROPHIES, {"$gte": ["$trophies_earned", "$trophies_total"]}]}, 1, 0,
+        ]}},
+        "completion_ratio_sum": {"$sum": {"$cond": [
+            _HAS_TROPHIES, {"$divide": ["$trophies_earned", "$trophies_total"]}, 0,
+        ]}},
+        "minutes_played": {"$sum": "$minutes_played"},
+    }}],
+    "by_source": [{"$group": {"_id": "$source", "count": {"$sum": 1}}}],
+    "by_completion_status": [{"$group": {"_id": "$completion_status", "count": {"$sum": 1}}}],
+    "by_rating": [{"$group": {"_id": "$rating", "count": {"$sum": 1}}}],
+}
+
+
+def stats_pipeline(series_collection: str) -> list:
+    """Pipeline to run on the games collection."""
+    return [
+        {"$project": _stats_fields("games")},
+        {"$unionWith": {"coll": series_collection, "pipeline": [
+            {"$unwind": "$games"},
+            {"$replaceRoot": {"newRoot": "$games"}},
+            {"$project": _stats_fields("game_series")},
+        ]}},
+        {"$facet": FACETS},
+    ]
+
+
+def _row(game: dict, source: str) -> dict:
+    return {
+        "source": source,
+        "completion_status": game.get("completion_status"),
+        "rating": game.get("rating"),
+        "platinum_status": bool(game.get("platinum_status")),
+        "trophies_earned": game.get("trophies_earned") or 0,
+        "trophies_total": game.get("trophies_total") or 0,
+        "minutes_played": game.get("minutes_played") or 0,
+    }
+
+
+def _facets_in_python(rows: list) -> dict:
+    """The FACETS stage for engines without aggregation support."""
+    totals = {
+        "games": 0, "platinum": 0, "trophies_earned": 0, "trophies_total": 0,
+        "with_trophies": 0, "fully_completed": 0, "completion_ratio_sum": 0.0, "minutes_played": 0,
+    }
+    groups = {"by_source": Counter(), "by_completion_status": Counter(), "by_rating": Counter()}
+    for row in rows:
+        totals["games"] += 1
+        totals["platinum"] += row["platinum_status"]
+        totals["trophies_earned"] += row["trophies_earned"]
+        totals["trophies_total"] += row["trophies_total"]
+        totals["minutes_played"] += row["minutes_played"]
+        if row["trophies_total"] > 0:
+            totals["with_trophies"] += 1
+            totals["fully_completed"] += row["trophies_earned"] >= row["trophies_total"]
+            totals["completion_ratio_sum"] += row["trophies_earned"] / row["trophies_total"]
+        groups["by_source"][row["source"]] += 1
+        groups["by_completion_status"][row["completion_status"]] += 1
+        groups["by_rating"][row["rating"]] += 1
+    facets = {name: [{"_id": key, "count": count} for key, count in counter.items()]
+              for name, counter in groups.items()}
+    facets["totals"] = [totals] if rows else []
+    return facets
+
+
+def _percent(part: float, whole: float):
+    return round(100 * part / whole, 2) if whole else None
+
+
+def summarize(facets: dict) -> dict:
+    """Shape the $facet output into the /api/stats response."""
+    totals = (facets.get("totals") or [{}])[0]
+    counts = {name: {group["_id"]: group["count"] for group in facets.get(name, [])}
+              for name in ("by_source", "by_completion_status", "by_rating")}
+    games = totals.get("games", 0)
+    ratings = counts["by_rating"]
+    return {
+        "games": {
+            "total": games,
+            "standalone": counts["by_source"].get("games", 0),
+            "in_series": counts["by_source"].get("game_series", 0),
+        },
+        "completion_status": {str(status): count for status, count in sorted(
+            counts["by_completion_status"].items(), key=lambda item: -item[1]
+        )},
+        "platinum": {"count": totals.get("platinum", 0), "percent": _percent(totals.get("platinum", 0), games)},
+        "rating_histogram": {str(rating): ratings.get(rating, 0) for rating in range(1, 11)},
+        "trophies": {
+            "earned": totals.get("trophies_earned", 0),
+            "total": totals.get("trophies_total", 0),
+            "completion_percent": _percent(totals.get("trophies_earned", 0), totals.get("trophies_total", 0)),
+            "games_with_trophies": totals.get("with_trophies", 0),
+            "average_game_completion_percent": _percent(
+                totals.get("completion_ratio_sum", 0), totals.get("with_trophies", 0)
+            ),
+            "fully_completed": totals.get("fully_completed", 0),
+        },
+        "playtime": {
+            "total_minutes": totals.get("minutes_played", 0),
+            "total_hours": round(totals.get("minutes_played", 0) / 60, 1),
+        },
+    }
+
+
+async def compute_stats(db) -> dict:
+    try:
+        result = await db.games.aggregate(stats_pipeline(db.game_series.name)).to_list(length=1)
+        facets = result[0]
+    except OperationFailure as e:
+        logger.info("Stats aggregation unavailable (%s); computing in Python", e)
+        projection = {"_id": 0, **{field: 1 for field in STATS_SOURCE_FIELDS}}
+        rows = [_row(game, "games") async for game in db.games.find({}, projection)]
+        async for series in db.game_series.find({}, {"_id": 0, "games": 1}):
+            rows.extend(_row(game, "game_series") for game in series.get("games", []))
+        facets = _facets_in_python(rows)
+    return summarize(facets)
@@ -0,0 +1,314 @@
+"""
+Minimal in-process metrics in the Prometheus text exposition format.
+
+No client library and no network dependency: the registry only renders text,
+which server.py serves at /metrics. Metric updates can come from Motor's
+worker threads (command monitoring), so every metric guards its state with
+a lock.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for label_values, value in items:
+            yield self.name, _format_labels(self.labels, label_values), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> [bucket counts..., sum, count]
+        self._values: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        for label_values, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket", _format_labels(self.labels, label_values, le), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labels, label_values), state[-2]
+            yield f"{self.name}_count", _format_labels(self.labels, label_values), state[-1]
+
+
+class CallbackMetric:
+    """A metric whose samples are read from `fn` at scrape time.
+
+    `fn` returns {label values tuple: value}; useful for exposing counters that
+    another component (such as the read cache) already keeps.
+    """
+
+    def __init__(self, name: str, help: str, kind: str, fn: Callable[[], Dict[LabelValues, float]],
+                 labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labels = labels
+        self.fn = fn
+
+    def samples(self):
+        for label_values, value in self.fn().items():
+            yield self.name, _format_labels(self.labels, label_values), value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def callback(self, name: str, help: str, kind: str, fn, labels: Tuple[str, ...] = ()) -> CallbackMetric:
+        return self.register(CallbackMetric(name, help, kind, fn, labels))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests by method, route template and status code.",
+    ("method", "route", "status"),
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by method, route template and status code.",
+    ("method", "route", "status"),
+)
+mongodb_commands_total = registry.counter(
+    "mongodb_commands_total", "MongoDB commands by collection, command and outcome.",
+    ("collection", "command", "outcome"),
+)
+mongodb_command_duration_seconds = registry.histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency by collection and command.",
+    ("collection", "command"), MONGO_BUCKETS,
+)
+mongodb_documents_returned_total = registry.counter(
+    "mongodb_documents_returned_total", "Documents returned by MongoDB commands.",
+    ("collection", "command"),
+)
+mongodb_pool_checkout_wait_seconds = registry.histogram(
+    "mongodb_pool_checkout_wait_seconds", "Time spent waiting for a pooled MongoDB connection, by outcome.",
+    ("outcome",), MONGO_BUCKETS,
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request count and latency per route template.
+
+    The route template (e.g. /api/games/{game_id}) is taken from the matched
+    route after the app has handled the request, which keeps label
+    cardinality bounded. Middlewares that answer without reaching the router
+    (single-flight followers, idempotent replays) put the template they
+    matched in scope["route_template"] instead.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or scope.get("route_template") or "unmatched"
+            labels = (scope["method"], template, str(status["code"]))
+            http_requests_total.inc(*labels)
+            http_request_duration_seconds.observe(time.perf_counter() - started, *labels)
+
+
+def _returned_documents(command_name: str, reply: dict) -> Optional[int]:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+        return len(batch) if batch is not None else None
+    if command_name == "findAndModify":
+        return 1 if reply.get("value") is not None else 0
+    return None
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """PyMongo command listener feeding per-collection, per-command metrics."""
+
+    def __init__(self):
+        self._pending: Dict[Tuple, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(event):
+        return event.connection_id, event.request_id
+
+    def started(self, event):
+        command = event.command
+        collection = command.get(event.command_name)
+        if event.command_name == "getMore":
+            collection = command.get("collection")
+        if not isinstance(collection, str):
+            collection = ""
+        with self._lock:
+            self._pending[self._key(event)] = collection
+
+    def _finish(self, event, outcome: str):
+        with self._lock:
+            collection = self._pending.pop(self._key(event), "")
+        labels = (collection, event.command_name)
+        mongodb_commands_total.inc(*labels, outcome)
+        mongodb_command_duration_seconds.observe(event.duration_micros / 1e6, *labels)
+        return labels
+
+    def succeeded(self, event):
+        labels = self._finish(event, "success")
+        returned = _returned_documents(event.command_name, event.reply)
+        if returned:
+            mongodb_documents_returned_total.inc(*labels, amount=returned)
+
+    def failed(self, event):
+        self._finish(event, "failure")
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """PyMongo pool listener measuring checkout waits and counting open / checked-out connections.
+
+    A checkout runs start to finish on one Motor worker thread, so the start
+    time is kept per thread.
+    """
+
+    def __init__(self):
+        self.open = 0
+        self.in_use = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _waited(self, outcome: str):
+        started = getattr(self._local, "started", None)
+        if started is not None:
+            self._local.started = None
+            mongodb_pool_checkout_wait_seconds.observe(time.perf_counter() - started, outcome)
+
+    def _count(self, field: str, delta: int):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + delta)
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        self._waited("success")
+        self._count("in_use", 1)
+
+    def connection_check_out_failed(self, event):
+        self._waited(event.reason)
+
+    def connection_checked_in(self, event):
+        self._count("in_use", -1)
+
+    def connection_created(self, event):
+        self._count("open", 1)
+
+    def connection_closed(self, event):
+        self._count("open", -1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
@@ -0,0 +1,38 @@
+"""
+Parsing of the free-text `time_played` field into whole minutes.
+
+`time_played` stays what the user typed ("120 hours", "1h 30m", "2:15",
+"45 min"); `minutes_played` is derived from it on every write so playtime can
+be filtered, sorted, indexed and summed in the database. A bare number means
+hours (the form the UI has always suggested), unless it follows an hours part
+("1h 30"), where it means minutes. Text without a number parses as 0.
+"""
+
+import re
+
+_UNIT_MINUTES = {
+    "d": 1440, "day": 1440, "days": 1440,
+    "h": 60, "hr": 60, "hrs": 60, "hour": 60, "hours": 60,
+    "m": 1, "min": 1, "mins": 1, "minute": 1, "minutes": 1,
+}
+_PART = re.compile(r"(\d+(?:[.,]\d+)?)\s*([a-z]*)", re.IGNORECASE)
+_CLOCK = re.compile(r"^\s*(\d+):([0-5]\d)\s*$")
+
+
+def parse_minutes(text) -> int:
+    if not text:
+        return 0
+    clock = _CLOCK.match(text)
+    if clock:
+        return int(clock[1]) * 60 + int(clock[2])
+    total = 0.0
+    bare_unit = 60
+    for number, unit in _PART.findall(text):
+        unit = unit.lower()
+        if unit and unit not in _UNIT_MINUTES:
+            continue
+        minutes_per_unit = _UNIT_MINUTES[unit] if unit else bare_unit
+        total += float(number.replace(",", ".")) * minutes_per_unit
+        if minutes_per_unit == 60:
+            bare_unit = 1
+    return round(total)
@@ -1,29 +1,141 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse, PlainTextResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, InsertOne, UpdateOne, DeleteOne
+from pymongo.errors import BulkWriteError
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, create_model, computed_field, model_validator
+from typing import List, Optional, Literal, Union, Annotated
 import uuid
-from datetime import datetime
+import re
+import json
+import base64
+import zlib
+import hashlib
+from functools import lru_cache
+import orjson
+import time
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from metrics import registry, MetricsMiddleware, CommandMetrics, PoolMetrics
+from slow_queries import SlowQueryLog
+from storage import ENGINES, open_database
+from library_stats import compute_stats
+from playtime import parse_minutes
+from events import EventHub, format_event
+from singleflight import SingleFlight, SingleFlightMiddleware
+from compression import CompressedCache, CompressionMiddleware
+from write_behind import WriteBehindQueue
+from idempotency import IdempotencyMiddleware, MemoryIdempotencyStore, MongoIdempotencyStore
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+def env_flag(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
 # safer env reading
+# Storage engine: "mongo" (default), "memory" or "sqlite" (see storage.py)
+STORAGE_ENGINE = os.getenv('STORAGE_ENGINE', 'mongo').strip().lower()
+if STORAGE_ENGINE not in ENGINES:
+    raise RuntimeError(f"STORAGE_ENGINE must be one of {', '.join(ENGINES)}.")
+SQLITE_PATH = os.getenv('SQLITE_PATH', str(ROOT_DIR / 'emergent.sqlite3'))
 MONGO_URL = os.getenv('MONGO_URL')
-DB_NAME = os.getenv('DB_NAME')
-if not MONGO_URL or not DB_NAME:
+DB_NAME = os.getenv('DB_NAME', 'emergent' if STORAGE_ENGINE != 'mongo' else None)
+if STORAGE_ENGINE == 'mongo' and (not MONGO_URL or not DB_NAME):
     raise RuntimeError("MONGO_URL and DB_NAME must be set in environment variables (.env).")
+# Motor client options; unset ones keep the driver defaults. MONGO_COMPRESSORS
+# takes e.g. "zstd,snappy,zlib" (zstd needs the zstandard package, snappy
+# python-snappy); MONGO_READ_PREFERENCE other than primary trades
+# read-your-writes for offloading reads to secondaries.
+MONGO_CLIENT_ENV = {
+    'maxPoolSize': ('MONGO_MAX_POOL_SIZE', int),
+    'minPoolSize': ('MONGO_MIN_POOL_SIZE', int),
+    'maxIdleTimeMS': ('MONGO_MAX_IDLE_TIME_MS', int),
+    'waitQueueTimeoutMS': ('MONGO_WAIT_QUEUE_TIMEOUT_MS', int),
+    'serverSelectionTimeoutMS': ('MONGO_SERVER_SELECTION_TIMEOUT_MS', int),
+    'connectTimeoutMS': ('MONGO_CONNECT_TIMEOUT_MS', int),
+    'socketTimeoutMS': ('MONGO_SOCKET_TIMEOUT_MS', int),
+    'compressors': ('MONGO_COMPRESSORS', str),
+    'readPreference': ('MONGO_READ_PREFERENCE', str),
+}
+MONGO_CLIENT_OPTIONS = {
+    option: parse(os.environ[name].strip())
+    for option, (name, parse) in MONGO_CLIENT_ENV.items() if os.getenv(name, '').strip()
+}
+# Store UUID ids as 16-byte BSON Binary instead of strings (mongo engine only;
+# convert existing documents with migrations/convert_ids.py first)
+BINARY_IDS = env_flag('BINARY_IDS')
+# Connections opened (by concurrent pings) in startup_db so the first requests
+# after a deploy do not pay for connection setup; 0 only pings once
+MONGO_WARMUP_CONNECTIONS = int(os.getenv('MONGO_WARMUP_CONNECTIONS', '10'))
+# In-process cache for GET-by-id routes
+READ_CACHE = env_flag('READ_CACHE')
+READ_CACHE_SIZE = int(os.getenv('READ_CACHE_SIZE', '1024'))
+READ_CACHE_TTL = float(os.getenv('READ_CACHE_TTL', '30'))
+# How long an instance trusts its in-process collection revisions before it
+# re-reads them, which bounds how late it notices other instances' writes
+REVISION_REFRESH_SECONDS = float(os.getenv('REVISION_REFRESH_SECONDS', '1'))
+# Slow-query log: threshold in ms (0 disables) and explain() sampling rate
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '100'))
+SLOW_QUERY_EXPLAINS_PER_MINUTE = int(os.getenv('SLOW_QUERY_EXPLAINS_PER_MINUTE', '6'))
+# Repair missing or inconsistent game series aggregates on startup (reads every
+# series); off by default, run migrations/backfill_series_aggregates.py instead
+BACKFILL_SERIES_AGGREGATES = env_flag('BACKFILL_SERIES_AGGREGATES')
+# Upper bound on the age of cached /api/stats results (writes through the API refresh them sooner)
+STATS_CACHE_TTL = float(os.getenv('STATS_CACHE_TTL', '300'))
+# Events a slow /api/events client may have queued before it is told to resync
+EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', '256'))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv('EVENTS_HEARTBEAT_SECONDS', '15'))
+SINGLE_FLIGHT = env_flag('SINGLE_FLIGHT', True)
+# Response compression (see compression.py); bodies under the minimum size go out as is
+COMPRESSION = env_flag('COMPRESSION', True)
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_LEVELS = {
+    'gzip': int(os.getenv('COMPRESSION_GZIP_LEVEL', '6')),
+    'br': int(os.getenv('COMPRESSION_BROTLI_LEVEL', '5')),
+    'zstd': int(os.getenv('COMPRESSION_ZSTD_LEVEL', '3')),
+}
+COMPRESSION_CACHE_MB = float(os.getenv('COMPRESSION_CACHE_MB', '32'))
+# Write-behind batching of POST /api/games and POST /api/game-series/{id}/games
+# (see write_behind.py): flush after this many queued writes or milliseconds
+WRITE_BEHIND = env_flag('WRITE_BEHIND')
+WRITE_BEHIND_MAX_ITEMS = int(os.getenv('WRITE_BEHIND_MAX_ITEMS', '100'))
+WRITE_BEHIND_MAX_DELAY_MS = float(os.getenv('WRITE_BEHIND_MAX_DELAY_MS', '50'))
+# Idempotency-Key support on create routes (see idempotency.py); keys expire after the TTL
+IDEMPOTENCY = env_flag('IDEMPOTENCY', True)
+IDEMPOTENCY_TTL_HOURS = float(os.getenv('IDEMPOTENCY_TTL_HOURS', '24'))
 
 CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*')
+# Trusted reads: documents are only ever written through the models below, so
+# read routes may serialize them as stored instead of re-validating them.
+TRUSTED_READS = env_flag('TRUSTED_READS')
 
-# MongoDB connection
-client = AsyncIOMotorClient(MONGO_URL)
-db = client[DB_NAME]
+# Database connection (command listeners only fire for the mongo engine)
+slow_query_log = SlowQueryLog(SLOW_QUERY_MS, SLOW_QUERY_EXPLAINS_PER_MINUTE)
+pool_metrics = PoolMetrics()
+db = open_database(
+    STORAGE_ENGINE,
+    db_name=DB_NAME,
+    mongo_url=MONGO_URL,
+    sqlite_path=SQLITE_PATH,
+    binary_ids=BINARY_IDS,
+    event_listeners=[CommandMetrics(), slow_query_log, pool_metrics],
+    **MONGO_CLIENT_OPTIONS,
+)
+client = db.client
+registry.callback(
+    "mongodb_pool_connections", "Pooled MongoDB connections, open and checked out.", "gauge",
+    lambda: {("open",): pool_metrics.open, ("in_use",): pool_metrics.in_use}, ("state",),
+)
 
 # Create the main app without a prefix
 app = FastAPI()
@@ -37,6 +149,573 @@ def sanitize_doc(doc: dict) -> dict:
         return doc
     return {k: v for k, v in doc.items() if k != "_id"}
 
+# Read queries never need Mongo's _id, nor the games' name_lower search key
+READ_PROJECTION = {"_id": 0, "name_lower": 0}
+
+def trusted_response(content, response: Optional[Response] = None) -> ORJSONResponse:
+    """Serialize stored documents with orjson, bypassing response_model validation."""
+    headers = dict(response.headers) if response is not None else None
+    if headers:
+        headers.pop("content-length", None)
+    return ORJSONResponse(content, headers=headers)
+
+# --- Field projection (?fields=id,name,rating) ---
+def parse_fields(fields: Optional[str], model) -> Optional[tuple]:
+    """Validate a comma separated field list against `model`; id is always included."""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in model.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    if "id" not in names:
+        names.insert(0, "id")
+    return tuple(dict.fromkeys(names))
+
+def field_projection(names: Optional[tuple]) -> dict:
+    if not names:
+        return READ_PROJECTION
+    return {"_id": 0, **{name: 1 for name in names}}
+
+@lru_cache(maxsize=256)
+def partial_model(model, names: tuple):
+    """A model with only `names` of `model`, all optional, for projected reads."""
+    return create_model(
+        f"Partial{model.__name__}",
+        **{name: (Optional[model.model_fields[name].annotation], None) for name in names},
+    )
+
+def partial_response(content, model, names: tuple, response: Optional[Response] = None) -> ORJSONResponse:
+    """Serialize projected documents, validated against the matching partial model."""
+    if not TRUSTED_READS:
+        partial = partial_model(model, names)
+
+        def dump(doc: dict) -> dict:
+            return partial(**doc).model_dump(mode="json", exclude_unset=True)
+
+        content = [dump(doc) for doc in content] if isinstance(content, list) else dump(content)
+    return trusted_response(content, response)
+
+# --- Read cache ---
+class ReadCache:
+    """Bounded LRU cache with a TTL for documents keyed by (collection, id).
+
+    Writers call invalidate() after their write completes. Every invalidation
+    bumps a generation counter; a reader takes token() before querying and
+    its put() is dropped if any invalidation happened in between, so a slow
+    read can never re-insert a document that was changed meanwhile.
+    """
+
+    def __init__(self, enabled: bool, maxsize: int, ttl: float):
+        self.enabled = enabled and maxsize > 0
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, collection: str, doc_id: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        key = (collection, doc_id)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def contains(self, collection: str, doc_id: str) -> bool:
+        """Whether get() would hit, without counting a lookup."""
+        if not self.enabled:
+            return False
+        entry = self._entries.get((collection, doc_id))
+        return entry is not None and entry[0] >= time.monotonic()
+
+    def token(self) -> int:
+        return self._generation
+
+    def put(self, collection: str, doc_id: str, doc: dict, token: int):
+        if not self.enabled or token != self._generation:
+            return
+        self._entries[(collection, doc_id)] = (time.monotonic() + self.ttl, doc)
+        self._entries.move_to_end((collection, doc_id))
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, collection: str, *doc_ids: str):
+        if not self.enabled:
+            return
+        self._generation += 1
+        for doc_id in doc_ids:
+            self._entries.pop((collection, doc_id), None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+read_cache = ReadCache(READ_CACHE, READ_CACHE_SIZE, READ_CACHE_TTL)
+registry.callback(
+    "read_cache_requests_total", "Read cache lookups by result.", "counter",
+    lambda: {("hit",): read_cache.hits, ("miss",): read_cache.misses}, ("result",),
+)
+registry.callback(
+    "read_cache_evictions_total", "Read cache LRU evictions.", "counter",
+    lambda: {(): read_cache.evictions},
+)
+registry.callback(
+    "read_cache_entries", "Documents currently held in the read cache.", "gauge",
+    lambda: {(): len(read_cache)},
+)
+
+async def find_by_id(collection, doc_id: str, fields: Optional[tuple] = None) -> Optional[dict]:
+    """Read one document by id through the read cache.
+
+    With `fields` and the cache disabled only those fields are read from Mongo;
+    with the cache enabled they are picked from the cached full document.
+    """
+    if fields and not read_cache.enabled:
+        return await collection.find_one({"id": doc_id}, field_projection(fields))
+    doc = read_cache.get(collection.name, doc_id)
+    if doc is None:
+        token = read_cache.token()
+        doc = await collection.find_one({"id": doc_id}, READ_PROJECTION)
+        if doc:
+            read_cache.put(collection.name, doc_id, doc, token)
+    if doc and fields:
+        doc = {name: doc[name] for name in fields if name in doc}
+    return doc
+
+# --- Collection revisions & conditional GETs ---
+# Every write bumps a per-collection revision counter stored in Mongo (so it is
+# shared by all instances). ETags are derived from that counter plus the
+# request URL, which lets GET routes answer 304 without fetching or
+# serializing the body. Each instance keeps the counters in process: its own
+# writes update them at once, and values older than REVISION_REFRESH_SECONDS
+# are re-read so writes made by other instances show up shortly after. The
+# shared counter is bumped in the background, so a write costs the client one
+# round trip. Until that bump lands the in-process value is provisional (one
+# above the last value known) and can miss a concurrent write of another
+# instance; the value the bump returns replaces it.
+REVISIONS_COLLECTION = "revisions"
+
+class Revisions:
+    """In-process copy of the per-collection revision counters."""
+
+    def __init__(self, refresh: float):
+        self.refresh = refresh
+        self._revs = {}  # collection name -> (rev, monotonic time it was read)
+        self._tasks = set()
+
+    def put(self, name: str, rev: int):
+        # Revisions only grow, so a refresh that raced a write cannot move one back
+        known = self._revs.get(name)
+        self._revs[name] = (max(rev, known[0]) if known else rev, time.monotonic())
+
+    def bump(self, name: str):
+        """Count a write to `name` at once and bump the shared counter in the background.
+
+        The shared counter ends at least one above the value known before, so
+        once the bump lands put() replaces the provisional value with it.
+        """
+        known = self._revs.get(name)
+        if known:
+            self._revs[name] = (known[0] + 1, known[1])
+        task = asyncio.get_running_loop().create_task(self._bump_shared(name))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _bump_shared(self, name: str):
+        try:
+            doc = await db[REVISIONS_COLLECTION].find_one_and_update(
+                {"_id": name}, {"$inc": {"rev": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            # Re-read on next use rather than keep a value the shared counter may never reach
+            logger.exception("Error bumping the %s revision: %s", name, e)
+            self._revs.pop(name, None)
+            return
+        self.put(name, doc["rev"])
+
+    async def stop(self):
+        """Wait for background bumps still running."""
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def get(self, *collections, cached: bool = False) -> tuple:
+        """Revision of each collection, in the order given.
+
+        Values older than `refresh` are re-read with one query; with `cached`
+        any known value is used, so the call needs no round trip at all.
+        """
+        names = [c.name for c in collections]
+        oldest = time.monotonic() - self.refresh
+        stale = [name for name in names if name not in self._revs or (not cached and self._revs[name][1] < oldest)]
+        if stale:
+            found = {doc["_id"]: doc["rev"] async for doc in db[REVISIONS_COLLECTION].find({"_id": {"$in": stale}})}
+            for name in stale:
+                self.put(name, found.get(name, 0))
+        return tuple(self._revs[name][0] for name in names)
+
+revisions = Revisions(REVISION_REFRESH_SECONDS)
+EVENT_COLLECTIONS = ("games", "game_series", "movie_series")
+
+event_hub = EventHub(EVENTS_QUEUE_SIZE)
+registry.callback(
+    "events_subscribers", "Connected /api/events subscribers.", "gauge", lambda: {(): len(event_hub)},
+)
+
+# Concurrent identical GETs on these routes share one execution (see singleflight.py)
+SINGLE_FLIGHT_ROUTES = (
+    "/api/games", "/api/games/{game_id}",
+    "/api/game-series", "/api/game-series/{series_id}", "/api/game-series/{series_id}/games",
+    "/api/movie-series", "/api/movie-series/{series_id}", "/api/movie-series/{series_id}/movies",
+    "/api/stats",
+)
+single_flight = SingleFlight(SINGLE_FLIGHT_ROUTES, SINGLE_FLIGHT)
+
+# POST routes that create documents honour Idempotency-Key (see idempotency.py)
+IDEMPOTENT_ROUTES = (
+    "/api/games", "/api/games/bulk",
+    "/api/game-series", "/api/game-series/bulk", "/api/game-series/{series_id}/games",
+    "/api/movie-series", "/api/movie-series/bulk", "/api/movie-series/{series_id}/movies",
+)
+IDEMPOTENCY_COLLECTION = "idempotency_keys"
+idempotency_ttl = timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+idempotency_store = None
+if IDEMPOTENCY:
+    idempotency_store = MongoIdempotencyStore(db[IDEMPOTENCY_COLLECTION], idempotency_ttl) \
+        if STORAGE_ENGINE == 'mongo' else MemoryIdempotencyStore(idempotency_ttl)
+
+compressed_cache = CompressedCache(int(COMPRESSION_CACHE_MB * 1024 * 1024)) if COMPRESSION_CACHE_MB > 0 else None
+if compressed_cache is not None:
+    registry.callback(
+        "compression_cache_requests_total", "Compressed body cache lookups by result.", "counter",
+        lambda: {("hit",): compressed_cache.hits, ("miss",): compressed_cache.misses}, ("result",),
+    )
+    registry.callback(
+        "compression_cache_bytes", "Bytes of compressed bodies held in the cache.", "gauge",
+        lambda: {(): compressed_cache.size},
+    )
+
+async def record_write(collection, *doc_ids: str, operation: str = "update"):
+    """Call after a write to `collection` completes.
+
+    Drops cached ids, bumps the collection revision (the shared counter in the
+    background, see Revisions.bump) and, unless change streams deliver events,
+    publishes a change event to /api/events subscribers.
+    """
+    read_cache.invalidate(collection.name, *doc_ids)
+    single_flight.forget()
+    revisions.bump(collection.name)
+    if collection.name in EVENT_COLLECTIONS:
+        event_hub.publish_local(collection.name, operation, doc_ids)
+
+write_behind = WriteBehindQueue(WRITE_BEHIND_MAX_ITEMS, WRITE_BEHIND_MAX_DELAY_MS / 1000, record_write) \
+    if WRITE_BEHIND else None
+if write_behind is not None:
+    registry.callback(
+        "write_behind_queued", "Writes waiting in the write-behind queue.", "gauge", lambda: {(): len(write_behind)},
+    )
+
+WAIT_DESCRIPTION = "With write-behind batching enabled, respond only once the write is flushed to the database"
+
+async def written(queued: asyncio.Future, not_found: str):
+    """Wait for a write-behind write; raise the HTTP error matching its outcome."""
+    outcome = await queued
+    if outcome == "not_found":
+        raise HTTPException(status_code=404, detail=not_found)
+    if outcome != "ok":
+        raise HTTPException(status_code=503, detail="Write failed, please retry")
+
+async def collection_etag(collection, request: Request, cached: bool = False) -> str:
+    rev, = await revisions.get(collection, cached=cached)
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    digest = hashlib.blake2b(f"{request.url.path}?{query}".encode(), digest_size=8).hexdigest()
+    return f'"{collection.name}-{rev}-{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    # "*" is ignored: the ETag is known before the route looks the resource up,
+    # so it would also answer 304 for ids that do not exist
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in tags
+
+async def conditional_get(
+    collection, request: Request, response: Response, cached: bool = False
+) -> Optional[Response]:
+    """Return a 304 response if the client's ETag is current, else tag `response`.
+
+    `cached` says the body will come from the read cache; the ETag then uses the
+    revision known in process without refreshing it, so a cache hit costs no
+    round trip (both may lag other instances' writes by up to READ_CACHE_TTL).
+    """
+    etag = await collection_etag(collection, request, cached)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+# --- Keyset pagination ---
+# Lists are ordered by (created_at, id) unless a sort field is requested; every
+# ordering ends in the unique id and is backed by a compound index (see
+# startup_db). A cursor encodes the sort key of the last document of a page,
+# so fetching the next page is an index seek instead of a skip-scan.
+PAGE_SORT = [("created_at", 1), ("id", 1)]
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+_EPOCH = datetime(1970, 1, 1)
+
+def page_sort(sort: str) -> list:
+    """Turn a sort parameter such as "rating" or "-rating" into a keyset sort spec."""
+    direction = -1 if sort.startswith("-") else 1
+    return [(sort.lstrip("-"), direction), ("id", direction)]
+
+def sort_key_name(sort: list) -> str:
+    field, direction = sort[0]
+    return field if direction == 1 else "-" + field
+
+def encode_cursor(doc: dict, sort: list = PAGE_SORT) -> str:
+    value = doc.get(sort[0][0])
+    data = {"k": sort_key_name(sort), "id": doc["id"]}
+    if isinstance(value, datetime):
+        data["t"] = (value.replace(tzinfo=None) - _EPOCH) // timedelta(milliseconds=1)
+    else:
+        data["v"] = value
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: list = PAGE_SORT) -> dict:
+    (field, direction), _ = sort
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = _EPOCH + timedelta(milliseconds=int(data["t"])) if "t" in data else data["v"]
+        last_id = str(data["id"])
+        if data.get("k", "created_at") != sort_key_name(sort):
+            raise ValueError("cursor was issued for another sort order")
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    op = "$gt" if direction == 1 else "$lt"
+    return {"$or": [
+        {field: {op: value}},
+        {field: value, "id": {op: last_id}},
+    ]}
+
+async def fetch_page(
+    collection,
+    response: Response,
+    limit: int,
+    skip: int,
+    cursor: Optional[str],
+    query: Optional[dict] = None,
+    sort: list = PAGE_SORT,
+    projection: dict = READ_PROJECTION,
+) -> List[dict]:
+    """Fetch one page of a collection, by cursor if given, otherwise by skip.
+
+    Sets the X-Next-Cursor header when the page is full, so clients can switch
+    to keyset paging from any page. Inclusion projections are widened by the
+    sort keys, which the next cursor is built from, and narrowed back after.
+    """
+    query = dict(query or {})
+    sort_only = []
+    if any(value for field, value in projection.items() if field != "_id"):
+        sort_only = [field for field, _ in sort if field not in projection]
+        projection = {**projection, **{field: 1 for field in sort_only}}
+    if cursor:
+        query.setdefault("$and", []).append(decode_cursor(cursor, sort))
+        find = collection.find(query, projection)
+    else:
+        find = collection.find(query, projection).skip(skip)
+    docs = await find.sort(sort).limit(limit).to_list(length=limit)
+    if len(docs) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(docs[-1], sort)
+    if sort_only:
+        for doc in docs:
+            for field in sort_only:
+                doc.pop(field, None)
+    return docs
+
+async def update_by_id(collection, doc_id: str, update: dict) -> Optional[dict]:
+    """Apply `update` to the document with `doc_id` and return it in one round trip.
+
+    Returns None when no such document exists. An empty update is a plain read.
+    """
+    if not update:
+        return await collection.find_one({"id": doc_id})
+    updated = await collection.find_one_and_update(
+        {"id": doc_id}, update, return_document=ReturnDocument.AFTER
+    )
+    if updated:
+        await record_write(collection, doc_id)
+    return updated
+
+async def fetch_members(collection, series_id: str, field: str, skip: int, limit: int) -> Optional[list]:
+    """Read one page of an embedded array with $slice, leaving the rest on the server."""
+    doc = await collection.find_one({"id": series_id}, {"_id": 0, "id": 1, field: {"$slice": [skip, limit]}})
+    if doc is None:
+        return None
+    return doc.get(field, [])
+
+# --- Series aggregates ---
+# Game series documents carry a member count and sums of these game fields, so
+# summaries never need the games array. Every write to the array updates them
+# in the same update document.
+SERIES_SUMMED_FIELDS = ("rating", "trophies_earned", "trophies_total")
+MEMBER_UPDATE_ATTEMPTS = 5
+
+def series_aggregates(games: list) -> dict:
+    """Aggregate fields of a game series, computed from its games."""
+    aggregates = {"game_count": len(games)}
+    for name in SERIES_SUMMED_FIELDS:
+        aggregates[f"{name}_sum"] = sum(g.get(name) or 0 for g in games)
+    return aggregates
+
+def aggregates_inc(old: Optional[dict], new: Optional[dict]) -> dict:
+    """$inc document for replacing member `old` by `new` (None when adding or removing)."""
+    inc = {"game_count": (new is not None) - (old is not None)}
+    for name in SERIES_SUMMED_FIELDS:
+        inc[f"{name}_sum"] = ((new or {}).get(name) or 0) - ((old or {}).get(name) or 0)
+    return {k: v for k, v in inc.items() if v}
+
+def rating_average(rating_sum: int, game_count: int) -> Optional[float]:
+    return round(rating_sum / game_count, 2) if game_count else None
+
+SUMMARY_PROJECTION = {"_id": 0, "games": 0}
+
+def with_average_rating(doc: dict) -> dict:
+    """Add the derived average to a raw series document (for responses that skip the models)."""
+    return {**doc, "average_rating": rating_average(doc.get("rating_sum", 0), doc.get("game_count", 0))}
+
+async def backfill_series_aggregates(collection) -> int:
+    """Recompute aggregates that are missing or disagree with the games; returns the count fixed.
+
+    Series stored before the aggregates were maintained have none, and during
+    a rolling deploy they can also go wrong: a new instance may $inc a series
+    that has no base yet, and an old one changes games without touching them.
+    Each fix only applies while the series still has the aggregates and member
+    ids that were read, so it never overwrites a concurrent write; those series
+    are checked again. Runs from migrations/backfill_series_aggregates.py, and
+    on startup with BACKFILL_SERIES_AGGREGATES.
+    """
+    names = ("game_count", *(f"{name}_sum" for name in SERIES_SUMMED_FIELDS))
+    projection = {"_id": 0, "id": 1, "games.id": 1, **{f"games.{n}": 1 for n in SERIES_SUMMED_FIELDS},
+                  **{name: 1 for name in names}}
+    fixed, query = 0, {}
+    for _ in range(MEMBER_UPDATE_ATTEMPTS):
+        ids, requests = [], []
+        async for doc in collection.find(query, projection):
+            games = doc.get("games") or []
+            aggregates = series_aggregates(games)
+            if all(doc.get(name) == value for name, value in aggregates.items()):
+                continue
+            guard = {
+                "id": doc["id"],
+                **{name: doc.get(name) for name in names},
+                **{f"games.{i}.id": game.get("id") for i, game in enumerate(games)},
+                f"games.{len(games)}": {"$exists": False},
+            }
+            ids.append(doc["id"])
+            requests.append(UpdateOne(guard, {"$set": aggregates}))
+        if not requests:
+            break
+        result = await collection.bulk_write(requests, ordered=False)
+        fixed += result.modified_count
+        await record_write(collection, *ids)
+        if result.modified_count == len(requests):
+            break
+        query = {"id": {"$in": ids}}
+    return fixed
+
+def member_guard(series_id: str, field: str, member: dict, names) -> dict:
+    """Match the series only while `member` still has the values we read."""
+    return {"id": series_id, field: {"$elemMatch": {"id": member["id"], **{n: member.get(n) for n in names}}}}
+
+async def update_member(
+    collection, series_id: str, field: str, member_id: str, changes: dict, aggregates: bool = False
+) -> Optional[dict]:
+    """Set fields of one embedded member matched by its id and return only that member.
+
+    Uses the positional $ operator, so the write (and the read back, through an
+    $elemMatch projection) is the size of the member, not of the array. With
+    `aggregates`, changes to summed fields also $inc the series aggregates by
+    the difference; the old values are read first and the update only applies
+    while they are unchanged, retrying on a concurrent change.
+    """
+    query = {"id": series_id, f"{field}.id": member_id}
+    projection = {"_id": 0, field: {"$elemMatch": {"id": member_id}}}
+    if not changes:
+        doc = await collection.find_one(query, projection)
+        return doc[field][0] if doc and doc.get(field) else None
+    update = {"$set": {f"{field}.$.{k}": v for k, v in changes.items()}}
+    summed = [name for name in SERIES_SUMMED_FIELDS if name in changes] if aggregates else []
+    if not summed:
+        doc = await collection.find_one_and_update(
+            query, update, projection=projection, return_document=ReturnDocument.AFTER
+        )
+        if not doc or not doc.get(field):
+            return None
+        await record_write(collection, series_id)
+        return doc[field][0]
+    for _ in range(MEMBER_UPDATE_ATTEMPTS):
+        doc = await collection.find_one(query, projection)
+        if not doc or not doc.get(field):
+            return None
+        old = doc[field][0]
+        inc = aggregates_inc(old, {**old, **changes})
+        doc = await collection.find_one_and_update(
+            member_guard(series_id, field, old, summed),
+            {**update, "$inc": inc} if inc else update,
+            projection=projection,
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc:
+            await record_write(collection, series_id)
+            return doc[field][0]
+    raise HTTPException(status_code=409, detail="Series was modified concurrently, please retry")
+
+async def remove_member(collection, series_id: str, field: str, member_id: str, aggregates: bool = False) -> bool:
+    """$pull one embedded member by id; with `aggregates`, subtract it from the series aggregates too."""
+    query = {"id": series_id, f"{field}.id": member_id}
+    update = {"$pull": {field: {"id": member_id}}}
+    if not aggregates:
+        result = await collection.update_one(query, update)
+        if result.modified_count == 0:
+            return False
+        await record_write(collection, series_id)
+        return True
+    for _ in range(MEMBER_UPDATE_ATTEMPTS):
+        doc = await collection.find_one(query, {"_id": 0, field: {"$elemMatch": {"id": member_id}}})
+        if not doc or not doc.get(field):
+            return False
+        old = doc[field][0]
+        result = await collection.update_one(
+            member_guard(series_id, field, old, SERIES_SUMMED_FIELDS),
+            {**update, "$inc": aggregates_inc(old, None)},
+        )
+        if result.modified_count:
+            await record_write(collection, series_id)
+            return True
+    raise HTTPException(status_code=409, detail="Series was modified concurrently, please retry")
+
 # --- Models ---
 class Game(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -50,8 +729,19 @@ class Game(BaseModel):
     platinum_status: bool = False
     trophies_earned: int = 0
     trophies_total: int = 0
+    minutes_played: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+    @model_validator(mode="before")
+    @classmethod
+    def fill_minutes_played(cls, data):
+        # Always recomputed from time_played, so a stale value sent back by a client
+        # (the games of a series PUT) never wins; also covers documents stored
+        # before the field existed
+        if isinstance(data, dict):
+            data = {**data, "minutes_played": parse_minutes(data.get("time_played"))}
+        return data
+
 class GameCreate(BaseModel):
     name: str
     image_url: str = ""
@@ -80,8 +770,40 @@ class GameSeries(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     series_name: str
     games: List[Game] = []
+    game_count: int = 0
+    rating_sum: int = 0
+    trophies_earned_sum: int = 0
+    trophies_total_sum: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+    @model_validator(mode="before")
+    @classmethod
+    def fill_aggregates(cls, data):
+        # New series, and documents stored before the aggregates were maintained
+        if isinstance(data, dict) and "game_count" not in data:
+            games = [g.dict() if isinstance(g, BaseModel) else g for g in data.get("games") or []]
+            data = {**data, **series_aggregates(games)}
+        return data
+
+    @computed_field
+    @property
+    def average_rating(self) -> Optional[float]:
+        return rating_average(self.rating_sum, self.game_count)
+
+class GameSeriesSummary(BaseModel):
+    id: str
+    series_name: str
+    game_count: int = 0
+    rating_sum: int = 0
+    trophies_earned_sum: int = 0
+    trophies_total_sum: int = 0
+    created_at: datetime
+
+    @computed_field
+    @property
+    def average_rating(self) -> Optional[float]:
+        return rating_average(self.rating_sum, self.game_count)
+
 class GameSeriesCreate(BaseModel):
     series_name: str
     games: List[GameCreate] = []
@@ -108,38 +830,320 @@ class MovieSeriesUpdate(BaseModel):
     series_name: Optional[str] = None
     movies: Optional[List[Movie]] = None
 
+GameSortField = Literal[
+    "created_at", "-created_at", "name", "-name", "rating", "-rating",
+    "trophies_earned", "-trophies_earned", "minutes_played", "-minutes_played",
+]
+
+# --- Bulk operation models ---
+BULK_MAX_OPERATIONS = 10000
+
+class BulkDelete(BaseModel):
+    op: Literal["delete"]
+    id: str
+
+class GameBulkCreate(BaseModel):
+    op: Literal["create"]
+    data: GameCreate
+
+class GameBulkUpdate(BaseModel):
+    op: Literal["update"]
+    id: str
+    data: GameUpdate
+
+class GameSeriesBulkCreate(BaseModel):
+    op: Literal["create"]
+    data: GameSeriesCreate
+
+class GameSeriesBulkUpdate(BaseModel):
+    op: Literal["update"]
+    id: str
+    data: GameSeriesUpdate
+
+class MovieSeriesBulkCreate(BaseModel):
+    op: Literal["create"]
+    data: MovieSeriesCreate
+
+class MovieSeriesBulkUpdate(BaseModel):
+    op: Literal["update"]
+    id: str
+    data: MovieSeriesUpdate
+
+GameBulkOperation = Annotated[Union[GameBulkCreate, GameBulkUpdate, BulkDelete], Field(discriminator="op")]
+GameSeriesBulkOperation = Annotated[
+    Union[GameSeriesBulkCreate, GameSeriesBulkUpdate, BulkDelete], Field(discriminator="op")
+]
+MovieSeriesBulkOperation = Annotated[
+    Union[MovieSeriesBulkCreate, MovieSeriesBulkUpdate, BulkDelete], Field(discriminator="op")
+]
+
+class BulkItemResult(BaseModel):
+    index: int
+    op: str
+    id: str
+    status: Literal["created", "updated", "deleted", "not_found", "error"]
+    error: Optional[str] = None
+
+class BulkResult(BaseModel):
+    results: List[BulkItemResult]
+
+def set_fields(update: BaseModel) -> dict:
+    """Fields given in a partial update model, for $set."""
+    return {k: v for k, v in update.dict().items() if v is not None}
+
+def game_set_fields(update: GameUpdate) -> dict:
+    """Like set_fields; a new time_played also sets the derived minutes_played."""
+    fields = set_fields(update)
+    if "time_played" in fields:
+        fields["minutes_played"] = parse_minutes(fields["time_played"])
+    return fields
+
+# Documents of the games collection also store the lowercased name, which
+# backs case-insensitive name search (see game_search_query). It is not part
+# of the Game model, so it never appears in responses; reads project it away.
+def game_document(game: Game) -> dict:
+    """A game as stored in the games collection."""
+    return {**game.dict(), "name_lower": game.name.lower()}
+
+def game_document_fields(update: GameUpdate) -> dict:
+    """game_set_fields for the games collection; a new name also sets name_lower."""
+    fields = game_set_fields(update)
+    if "name" in fields:
+        fields["name_lower"] = fields["name"].lower()
+    return fields
+
+def game_series_set_fields(update: GameSeriesUpdate) -> dict:
+    """Like set_fields; replacing the games also replaces the aggregates in the same $set."""
+    fields = set_fields(update)
+    if "games" in fields:
+        fields.update(series_aggregates(fields["games"]))
+    return fields
+
+async def run_bulk(collection, operations: list, model, changes=set_fields, document=None) -> BulkResult:
+    """Run create/update/delete operations as one unordered bulk_write.
+
+    Targets of update/delete operations are looked up with a single $in query
+    first, so missing ids are reported per item instead of as a bulk total.
+    `changes` turns an update operation's data into the fields to $set, and
+    `document` a created model into the document to insert (default .dict()).
+    """
+    if len(operations) > BULK_MAX_OPERATIONS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_OPERATIONS} operations per request")
+    target_ids = list({op.id for op in operations if op.op != "create"})
+    existing = set()
+    if target_ids:
+        async for doc in collection.find({"id": {"$in": target_ids}}, {"_id": 0, "id": 1}):
+            existing.add(doc["id"])
+
+    results = []
+    requests = []
+    request_items = []  # position in `requests` -> result it belongs to
+    for index, op in enumerate(operations):
+        if op.op == "create":
+            obj = model(**op.data.dict())
+            doc = document(obj) if document else obj.dict()
+            item = BulkItemResult(index=index, op=op.op, id=doc["id"], status="created")
+            request = InsertOne(doc)
+        elif op.id not in existing:
+            results.append(BulkItemResult(index=index, op=op.op, id=op.id, status="not_found"))
+            continue
+        elif op.op == "update":
+            item = BulkItemResult(index=index, op=op.op, id=op.id, status="updated")
+            update_data = changes(op.data)
+            if not update_data:
+                results.append(item)
+                continue
+            request = UpdateOne({"id": op.id}, {"$set": update_data})
+        else:
+            item = BulkItemResult(index=index, op=op.op, id=op.id, status="deleted")
+            request = DeleteOne({"id": op.id})
+        results.append(item)
+        requests.append(request)
+        request_items.append(item)
+
+    if requests:
+        try:
+            await collection.bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                item = request_items[error["index"]]
+                item.status = "error"
+                item.error = error.get("errmsg")
+        finally:
+            await record_write(collection, *(item.id for item in request_items), operation="bulk")
+    return BulkResult(results=results)
+
+# --- Batch get ---
+BATCH_GET_MAX_IDS = 5000
+
+class BatchGetRequest(BaseModel):
+    ids: List[str]
+
+class BatchGetItem(BaseModel):
+    id: str
+    status: Literal["found", "not_found"]
+    data: Optional[dict] = None
+
+class BatchGetResult(BaseModel):
+    results: List[BatchGetItem]
+
+async def batch_get(collection, ids: List[str], model, names: Optional[tuple], trusted=None) -> ORJSONResponse:
+    """Fetch `ids` with one $in query on the unique id index.
+
+    Results follow the request order (duplicates included); ids without a
+    document get a not_found item. `trusted` shapes raw documents when
+    TRUSTED_READS skips the model.
+    """
+    if len(ids) > BATCH_GET_MAX_IDS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_GET_MAX_IDS} ids per request")
+    docs = {}
+    if ids:
+        query = {"id": {"$in": list(dict.fromkeys(ids))}}
+        async for doc in collection.find(query, field_projection(names)):
+            docs[doc["id"]] = doc
+
+    def dump(doc: dict) -> dict:
+        if TRUSTED_READS:
+            return trusted(doc) if trusted and not names else doc
+        if names:
+            return partial_model(model, names)(**doc).model_dump(mode="json", exclude_unset=True)
+        return model(**sanitize_doc(doc)).model_dump(mode="json")
+
+    results = [
+        {"id": doc_id, "status": "found", "data": dump(docs[doc_id])} if doc_id in docs
+        else {"id": doc_id, "status": "not_found", "data": None}
+        for doc_id in ids
+    ]
+    return trusted_response({"results": results})
+
 # --- Routes (with sanitation & pagination where it makes sense) ---
+FIELDS_DESCRIPTION = "Comma separated top-level fields to return (id is always included)"
 
 # Games
-@api_router.post("/games", response_model=Game)
-async def create_game(game: GameCreate):
+@api_router.post("/games", response_model=Game, responses={202: {"model": Game, "description": "Queued"}})
+async def create_game(game: GameCreate, wait: bool = Query(False, description=WAIT_DESCRIPTION)):
     game_dict = game.dict()
     game_obj = Game(**game_dict)
-    await db.games.insert_one(game_obj.dict())
+    if write_behind is not None:
+        queued = write_behind.insert(db.games, game_document(game_obj))
+        if not wait:
+            return ORJSONResponse(game_obj.model_dump(mode="json"), status_code=202)
+        await written(queued, "Game not found")
+        return game_obj
+    await db.games.insert_one(game_document(game_obj))
+    await record_write(db.games, game_obj.id, operation="insert")
     return game_obj
 
+@api_router.post("/games/bulk", response_model=BulkResult)
+async def bulk_games(operations: List[GameBulkOperation]):
+    return await run_bulk(db.games, operations, Game, game_document_fields, game_document)
+
+@api_router.post("/games/batch-get", response_model=BatchGetResult)
+async def batch_get_games(
+    batch: BatchGetRequest, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+):
+    return await batch_get(db.games, batch.ids, Game, parse_fields(fields, Game))
+
+def game_search_query(
+    q: Optional[str],
+    name: Optional[str],
+    name_prefix: Optional[str],
+    completion_status: Optional[str],
+    platinum_status: Optional[bool],
+    min_rating: Optional[int],
+    max_rating: Optional[int],
+    min_minutes_played: Optional[int] = None,
+    max_minutes_played: Optional[int] = None,
+) -> dict:
+    query = {}
+    if q:
+        query["$text"] = {"$search": q}
+    # Case-insensitive through the lowercased copy of the name: an anchored,
+    # case-sensitive regex is a bounded range on the (name_lower, id) index
+    if name:
+        query["name_lower"] = {"$regex": re.escape(name.lower())}
+    elif name_prefix:
+        query["name_lower"] = {"$regex": "^" + re.escape(name_prefix.lower())}
+    if completion_status is not None:
+        query["completion_status"] = completion_status
+    if platinum_status is not None:
+        query["platinum_status"] = platinum_status
+    if min_rating is not None or max_rating is not None:
+        query["rating"] = {}
+        if min_rating is not None:
+            query["rating"]["$gte"] = min_rating
+        if max_rating is not None:
+            query["rating"]["$lte"] = max_rating
+    if min_minutes_played is not None or max_minutes_played is not None:
+        query["minutes_played"] = {}
+        if min_minutes_played is not None:
+            query["minutes_played"]["$gte"] = min_minutes_played
+        if max_minutes_played is not None:
+            query["minutes_played"]["$lte"] = max_minutes_played
+    return query
+
 @api_router.get("/games", response_model=List[Game])
-async def get_games(limit: int = Query(100, gt=0, le=1000), skip: int = Query(0, ge=0)):
-    cursor = db.games.find().skip(skip).limit(limit)
-    docs = await cursor.to_list(length=limit)
+async def get_games(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, gt=0, le=1000),
+    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    q: Optional[str] = Query(None, description="Full-text search over name and notes"),
+    name: Optional[str] = Query(None, description="Case-insensitive substring of the name"),
+    name_prefix: Optional[str] = Query(None, description="Case-insensitive name prefix"),
+    completion_status: Optional[str] = Query(None),
+    platinum_status: Optional[bool] = Query(None),
+    min_rating: Optional[int] = Query(None, ge=1, le=10),
+    max_rating: Optional[int] = Query(None, ge=1, le=10),
+    min_minutes_played: Optional[int] = Query(None, ge=0),
+    max_minutes_played: Optional[int] = Query(None, ge=0),
+    sort: GameSortField = Query("created_at"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+):
+    not_modified = await conditional_get(db.games, request, response)
+    if not_modified:
+        return not_modified
+    names = parse_fields(fields, Game)
+    query = game_search_query(
+        q, name, name_prefix, completion_status, platinum_status, min_rating, max_rating,
+        min_minutes_played, max_minutes_played,
+    )
+    docs = await fetch_page(db.games, response, limit, skip, cursor, query, page_sort(sort), field_projection(names))
+    if names:
+        return partial_response(docs, Game, names, response)
+    if TRUSTED_READS:
+        return trusted_response(docs, response)
     return [Game(**sanitize_doc(d)) for d in docs]
 
 @api_router.get("/games/{game_id}", response_model=Game)
-async def get_game(game_id: str):
-    game = await db.games.find_one({"id": game_id})
+async def get_game(
+    game_id: str,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+):
+    not_modified = await conditional_get(
+        db.games, request, response, cached=read_cache.contains(db.games.name, game_id)
+    )
+    if not_modified:
+        return not_modified
+    names = parse_fields(fields, Game)
+    game = await find_by_id(db.games, game_id, names)
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
+    if names:
+        return partial_response(game, Game, names, response)
+    if TRUSTED_READS:
+        return trusted_response(game, response)
     return Game(**sanitize_doc(game))
 
 @api_router.put("/games/{game_id}", response_model=Game)
 async def update_game(game_id: str, game_update: GameUpdate):
-    existing_game = await db.games.find_one({"id": game_id})
-    if not existing_game:
+    update_data = game_document_fields(game_update)
+    updated_game = await update_by_id(db.games, game_id, {"$set": update_data} if update_data else {})
+    if not updated_game:
         raise HTTPException(status_code=404, detail="Game not found")
-    update_data = {k: v for k, v in game_update.dict().items() if v is not None}
-    if update_data:
-        await db.games.update_one({"id": game_id}, {"$set": update_data})
-    updated_game = await db.games.find_one({"id": game_id})
     return Game(**sanitize_doc(updated_game))
 
 @api_router.delete("/games/{game_id}")
@@ -147,6 +1151,7 @@ async def delete_game(game_id: str):
     result = await db.games.delete_one({"id": game_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Game not found")
+    await record_write(db.games, game_id, operation="delete")
     return {"message": "Game deleted successfully"}
 
 # Game Series
@@ -155,30 +1160,75 @@ async def create_game_series(series: GameSeriesCreate):
     series_dict = series.dict()
     series_obj = GameSeries(**series_dict)
     await db.game_series.insert_one(series_obj.dict())
+    await record_write(db.game_series, series_obj.id, operation="insert")
     return series_obj
 
+@api_router.post("/game-series/bulk", response_model=BulkResult)
+async def bulk_game_series(operations: List[GameSeriesBulkOperation]):
+    return await run_bulk(db.game_series, operations, GameSeries, game_series_set_fields)
+
+@api_router.post("/game-series/batch-get", response_model=BatchGetResult)
+async def batch_get_game_series(
+    batch: BatchGetRequest, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+):
+    return await batch_get(
+        db.game_series, batch.ids, GameSeries, parse_fields(fields, GameSeries), with_average_rating,
+    )
+
 @api_router.get("/game-series", response_model=List[GameSeries])
-async def get_game_series(limit: int = Query(100, gt=0, le=1000), skip: int = Query(0, ge=0)):
-    cursor = db.game_series.find().skip(skip).limit(limit)
-    docs = await cursor.to_list(length=limit)
+async def get_game_series(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, gt=0, le=1000),
+    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    summary: bool = Query(False, description="Return only id, name, created_at and the aggregates, without games"),
+):
+    if summary and fields:
+        raise HTTPException(status_code=400, detail="summary and fields cannot be combined")
+    not_modified = await conditional_get(db.game_series, request, response)
+    if not_modified:
+        return not_modified
+    if summary:
+        docs = await fetch_page(db.game_series, response, limit, skip, cursor, projection=SUMMARY_PROJECTION)
+        return trusted_response([GameSeriesSummary(**d).dict() for d in docs], response)
+    names = parse_fields(fields, GameSeries)
+    docs = await fetch_page(db.game_series, response, limit, skip, cursor, projection=field_projection(names))
+    if names:
+        return partial_response(docs, GameSeries, names, response)
+    if TRUSTED_READS:
+        return trusted_response([with_average_rating(d) for d in docs], response)
     return [GameSeries(**sanitize_doc(d)) for d in docs]
 
 @api_router.get("/game-series/{series_id}", response_model=GameSeries)
-async def get_game_series_by_id(series_id: str):
-    series = await db.game_series.find_one({"id": series_id})
+async def get_game_series_by_id(
+    series_id: str,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+):
+    not_modified = await conditional_get(
+        db.game_series, request, response, cached=read_cache.contains(db.game_series.name, series_id)
+    )
+    if not_modified:
+        return not_modified
+    names = parse_fields(fields, GameSeries)
+    series = await find_by_id(db.game_series, series_id, names)
     if not series:
         raise HTTPException(status_code=404, detail="Game series not found")
+    if names:
+        return partial_response(series, GameSeries, names, response)
+    if TRUSTED_READS:
+        return trusted_response(with_average_rating(series), response)
     return GameSeries(**sanitize_doc(series))
 
 @api_router.put("/game-series/{series_id}", response_model=GameSeries)
 async def update_game_series(series_id: str, series_update: GameSeriesUpdate):
-    existing_series = await db.game_series.find_one({"id": series_id})
-    if not existing_series:
+    update_data = game_series_set_fields(series_update)
+    updated_series = await update_by_id(db.game_series, series_id, {"$set": update_data} if update_data else {})
+    if not updated_series:
         raise HTTPException(status_code=404, detail="Game series not found")
-    update_data = {k: v for k, v in series_update.dict().items() if v is not None}
-    if update_data:
-        await db.game_series.update_one({"id": series_id}, {"$set": update_data})
-    updated_series = await db.game_series.find_one({"id": series_id})
     return GameSeries(**sanitize_doc(updated_series))
 
 @api_router.delete("/game-series/{series_id}")
@@ -186,48 +1236,133 @@ async def delete_game_series(series_id: str):
     result = await db.game_series.delete_one({"id": series_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Game series not found")
+    await record_write(db.game_series, series_id, operation="delete")
     return {"message": "Game series deleted successfully"}
 
-@api_router.post("/game-series/{series_id}/games", response_model=GameSeries)
-async def add_game_to_series(series_id: str, game: GameCreate):
-    series = await db.game_series.find_one({"id": series_id})
-    if not series:
-        raise HTTPException(status_code=404, detail="Game series not found")
+@api_router.post(
+    "/game-series/{series_id}/games", response_model=GameSeries,
+    responses={202: {"model": Game, "description": "Queued; the response is the new game"}},
+)
+async def add_game_to_series(
+    series_id: str, game: GameCreate, wait: bool = Query(False, description=WAIT_DESCRIPTION),
+):
     game_obj = Game(**game.dict())
-    await db.game_series.update_one({"id": series_id}, {"$push": {"games": game_obj.dict()}})
-    updated_series = await db.game_series.find_one({"id": series_id})
+    game_doc = game_obj.dict()
+    if write_behind is not None:
+        queued = write_behind.push(db.game_series, series_id, "games", game_doc, aggregates_inc(None, game_doc))
+        if not wait:
+            return ORJSONResponse(game_obj.model_dump(mode="json"), status_code=202)
+        await written(queued, "Game series not found")
+        updated_series = await db.game_series.find_one({"id": series_id}, READ_PROJECTION)
+        if not updated_series:
+            raise HTTPException(status_code=404, detail="Game series not found")
+        return GameSeries(**sanitize_doc(updated_series))
+    updated_series = await update_by_id(
+        db.game_series, series_id, {"$push": {"games": game_doc}, "$inc": aggregates_inc(None, game_doc)}
+    )
+    if not updated_series:
+        raise HTTPException(status_code=404, detail="Game series not found")
     return GameSeries(**sanitize_doc(updated_series))
 
+@api_router.get("/game-series/{series_id}/games", response_model=List[Game])
+async def get_series_games(
+    series_id: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(100, gt=0, le=1000),
+    skip: int = Query(0, ge=0),
+):
+    not_modified = await conditional_get(db.game_series, request, response)
+    if not_modified:
+        return not_modified
+    games = await fetch_members(db.game_series, series_id, "games", skip, limit)
+    if games is None:
+        raise HTTPException(status_code=404, detail="Game series not found")
+    if TRUSTED_READS:
+        return trusted_response(games, response)
+    return [Game(**g) for g in games]
+
+@api_router.patch("/game-series/{series_id}/games/{game_id}", response_model=Game)
+async def update_series_game(series_id: str, game_id: str, game_update: GameUpdate):
+    update_data = game_set_fields(game_update)
+    game = await update_member(db.game_series, series_id, "games", game_id, update_data, aggregates=True)
+    if not game:
+        raise HTTPException(status_code=404, detail="Game not found in series")
+    return Game(**game)
+
+@api_router.delete("/game-series/{series_id}/games/{game_id}")
+async def delete_series_game(series_id: str, game_id: str):
+    if not await remove_member(db.game_series, series_id, "games", game_id, aggregates=True):
+        raise HTTPException(status_code=404, detail="Game not found in series")
+    return {"message": "Game removed from series successfully"}
+
 # Movie Series
 @api_router.post("/movie-series", response_model=MovieSeries)
 async def create_movie_series(series: MovieSeriesCreate):
     series_dict = series.dict()
     series_obj = MovieSeries(**series_dict)
     await db.movie_series.insert_one(series_obj.dict())
+    await record_write(db.movie_series, series_obj.id, operation="insert")
     return series_obj
 
+@api_router.post("/movie-series/bulk", response_model=BulkResult)
+async def bulk_movie_series(operations: List[MovieSeriesBulkOperation]):
+    return await run_bulk(db.movie_series, operations, MovieSeries)
+
+@api_router.post("/movie-series/batch-get", response_model=BatchGetResult)
+async def batch_get_movie_series(
+    batch: BatchGetRequest, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+):
+    return await batch_get(db.movie_series, batch.ids, MovieSeries, parse_fields(fields, MovieSeries))
+
 @api_router.get("/movie-series", response_model=List[MovieSeries])
-async def get_movie_series(limit: int = Query(100, gt=0, le=1000), skip: int = Query(0, ge=0)):
-    cursor = db.movie_series.find().skip(skip).limit(limit)
-    docs = await cursor.to_list(length=limit)
+async def get_movie_series(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, gt=0, le=1000),
+    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+):
+    not_modified = await conditional_get(db.movie_series, request, response)
+    if not_modified:
+        return not_modified
+    names = parse_fields(fields, MovieSeries)
+    docs = await fetch_page(db.movie_series, response, limit, skip, cursor, projection=field_projection(names))
+    if names:
+        return partial_response(docs, MovieSeries, names, response)
+    if TRUSTED_READS:
+        return trusted_response(docs, response)
     return [MovieSeries(**sanitize_doc(d)) for d in docs]
 
 @api_router.get("/movie-series/{series_id}", response_model=MovieSeries)
-async def get_movie_series_by_id(series_id: str):
-    series = await db.movie_series.find_one({"id": series_id})
+async def get_movie_series_by_id(
+    series_id: str,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+):
+    not_modified = await conditional_get(
+        db.movie_series, request, response, cached=read_cache.contains(db.movie_series.name, series_id)
+    )
+    if not_modified:
+        return not_modified
+    names = parse_fields(fields, MovieSeries)
+    series = await find_by_id(db.movie_series, series_id, names)
     if not series:
         raise HTTPException(status_code=404, detail="Movie series not found")
+    if names:
+        return partial_response(series, MovieSeries, names, response)
+    if TRUSTED_READS:
+        return trusted_response(series, response)
     return MovieSeries(**sanitize_doc(series))
 
 @api_router.put("/movie-series/{series_id}", response_model=MovieSeries)
 async def update_movie_series(series_id: str, series_update: MovieSeriesUpdate):
-    existing_series = await db.movie_series.find_one({"id": series_id})
-    if not existing_series:
-        raise HTTPException(status_code=404, detail="Movie series not found")
     update_data = {k: v for k, v in series_update.dict().items() if v is not None}
-    if update_data:
-        await db.movie_series.update_one({"id": series_id}, {"$set": update_data})
-    updated_series = await db.movie_series.find_one({"id": series_id})
+    updated_series = await update_by_id(db.movie_series, series_id, {"$set": update_data} if update_data else {})
+    if not updated_series:
+        raise HTTPException(status_code=404, detail="Movie series not found")
     return MovieSeries(**sanitize_doc(updated_series))
 
 @api_router.delete("/movie-series/{series_id}")
@@ -235,32 +1370,182 @@ async def delete_movie_series(series_id: str):
     result = await db.movie_series.delete_one({"id": series_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Movie series not found")
+    await record_write(db.movie_series, series_id, operation="delete")
     return {"message": "Movie series deleted successfully"}
 
 @api_router.post("/movie-series/{series_id}/movies", response_model=MovieSeries)
 async def add_movie_to_series(series_id: str, movie: Movie):
-    series = await db.movie_series.find_one({"id": series_id})
-    if not series:
+    updated_series = await update_by_id(db.movie_series, series_id, {"$push": {"movies": movie.dict()}})
+    if not updated_series:
         raise HTTPException(status_code=404, detail="Movie series not found")
-    await db.movie_series.update_one({"id": series_id}, {"$push": {"movies": movie.dict()}})
-    updated_series = await db.movie_series.find_one({"id": series_id})
     return MovieSeries(**sanitize_doc(updated_series))
 
+@api_router.get("/movie-series/{series_id}/movies", response_model=List[Movie])
+async def get_series_movies(
+    series_id: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(100, gt=0, le=1000),
+    skip: int = Query(0, ge=0),
+):
+    not_modified = await conditional_get(db.movie_series, request, response)
+    if not_modified:
+        return not_modified
+    movies = await fetch_members(db.movie_series, series_id, "movies", skip, limit)
+    if movies is None:
+        raise HTTPException(status_code=404, detail="Movie series not found")
+    if TRUSTED_READS:
+        return trusted_response(movies, response)
+    return [Movie(**m) for m in movies]
+
+# Export
+# Public collection names (as used in the routes) -> Mongo collection names
+EXPORT_COLLECTIONS = {"games": "games", "game-series": "game_series", "movie-series": "movie_series"}
+EXPORT_BATCH_SIZE = 2000
+
+async def export_chunks(cursor, compress: bool):
+    """Yield NDJSON for every document of `cursor`, one chunk per driver batch."""
+    gzipper = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    lines = []
+    async for doc in cursor:
+        lines.append(orjson.dumps(doc, option=orjson.OPT_APPEND_NEWLINE))
+        if len(lines) >= EXPORT_BATCH_SIZE:
+            chunk = b"".join(lines)
+            lines.clear()
+            yield gzipper.compress(chunk) if gzipper else chunk
+    chunk = b"".join(lines)
+    if gzipper:
+        yield gzipper.compress(chunk) + gzipper.flush()
+    elif chunk:
+        yield chunk
+
+@api_router.get("/export/{collection}")
+async def export_collection(collection: str, request: Request, response: Response, gzip: bool = Query(False)):
+    if collection not in EXPORT_COLLECTIONS:
+        raise HTTPException(status_code=404, detail="Unknown collection")
+    source = db[EXPORT_COLLECTIONS[collection]]
+    not_modified = await conditional_get(source, request, response)
+    if not_modified:
+        return not_modified
+    cursor = source.find({}, READ_PROJECTION, batch_size=EXPORT_BATCH_SIZE)
+    headers = {"Content-Disposition": f'attachment; filename="{collection}.ndjson"', **response.headers}
+    headers.pop("content-length", None)
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(export_chunks(cursor, gzip), media_type="application/x-ndjson", headers=headers)
+
+# Library statistics
+class StatsCache:
+    """The last /api/stats result and the collection revisions it was computed at.
+
+    Dashboards poll this route; as long as no write bumped the revisions (and
+    the TTL has not passed) a request costs at most one revisions lookup
+    instead of an aggregation over every game.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.lock = asyncio.Lock()
+        self._revisions = None
+        self._computed_at = 0.0
+        self._result = None
+
+    def get(self, revisions: tuple) -> Optional[dict]:
+        if self._revisions != revisions or time.monotonic() - self._computed_at >= self.ttl:
+            return None
+        return self._result
+
+    def put(self, revisions: tuple, result: dict):
+        self._revisions = revisions
+        self._computed_at = time.monotonic()
+        self._result = result
+
+stats_cache = StatsCache(STATS_CACHE_TTL)
+
+@api_router.get("/stats")
+async def library_stats():
+    """Library-wide statistics over standalone games and games in series."""
+    revs = await revisions.get(db.games, db.game_series)
+    result = stats_cache.get(revs)
+    if result is None:
+        async with stats_cache.lock:
+            result = stats_cache.get(revs)
+            if result is None:
+                result = await compute_stats(db)
+                result["generated_at"] = datetime.utcnow()
+                stats_cache.put(revs, result)
+    return result
+
+# Change events
+@api_router.get("/events")
+async def change_events(
+    collections: Optional[str] = Query(None, description="Comma separated collections to follow (default all)"),
+):
+    """Server-Sent Events stream of creates, updates and deletes.
+
+    Each "change" event names the collection, the operation and the affected
+    ids (empty when unknown, e.g. deletes seen by a change stream). A "resync"
+    event means events were dropped because the client fell behind; it should
+    refetch what it shows.
+    """
+    names = [c.strip() for c in collections.split(",") if c.strip()] if collections else None
+    unknown = set(names or ()) - set(EVENT_COLLECTIONS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown collections: {', '.join(sorted(unknown))}")
+
+    async def stream():
+        subscription = event_hub.subscribe(names)
+        try:
+            yield "retry: 3000\n" + format_event({"type": "ready", "source": event_hub.source})
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_event(event)
+        finally:
+            event_hub.unsubscribe(subscription)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(stream(), media_type="text/event-stream", headers=headers)
+
+@api_router.get("/cache/stats")
+async def cache_stats():
+    return read_cache.stats()
+
 # Basic health check
 @api_router.get("/")
 async def root():
     return {"message": "Gaming & Movie Collection API is running!"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 # Include router and middleware
 app.include_router(api_router)
 
+# Idempotency runs innermost so it stores uncompressed responses; compression
+# runs inside single-flight, so coalesced requests replay compressed bytes
+app.add_middleware(IdempotencyMiddleware, routes=IDEMPOTENT_ROUTES, store=idempotency_store)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESSION_MIN_SIZE,
+    levels=COMPRESSION_LEVELS,
+    cache=compressed_cache,
+    enabled=COMPRESSION,
+)
+app.add_middleware(SingleFlightMiddleware, single_flight=single_flight)
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=False,  # <- wichtig: keine Credentials, damit ["*"]/mehrere Origins funktionieren
     allow_origins=CORS_ORIGINS.split(',') if isinstance(CORS_ORIGINS, str) else CORS_ORIGINS,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Idempotent-Replayed"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Configure logging
 logging.basicConfig(
@@ -269,17 +1554,58 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+async def warm_up_pool(connections: int):
+    """Ping once to fail fast on a bad configuration, then open `connections` in parallel."""
+    started = time.perf_counter()
+    try:
+        await client.admin.command('ping')
+        await asyncio.gather(*(client.admin.command('ping') for _ in range(connections)))
+    except Exception as e:
+        logger.error("MongoDB ping failed during startup: %s", e)
+        return
+    logger.info("MongoDB reachable; %d pooled connections open after %.0f ms.",
+                pool_metrics.open, (time.perf_counter() - started) * 1000)
+
 # Startup: create useful indexes
 @app.on_event("startup")
 async def startup_db():
+    slow_query_log.attach(asyncio.get_running_loop(), client)
+    if STORAGE_ENGINE == 'mongo':
+        await warm_up_pool(MONGO_WARMUP_CONNECTIONS)
     try:
         await db.games.create_index("id", unique=True)
         await db.game_series.create_index("id", unique=True)
         await db.movie_series.create_index("id", unique=True)
+        for collection in (db.games, db.game_series, db.movie_series):
+            await collection.create_index(PAGE_SORT)
+        # Game search: filters first, then the sort key, then id for keyset paging
+        await db.games.create_index([("name", "text"), ("notes", "text")], name="games_text")
+        await db.games.create_index([("name", 1), ("id", 1)])
+        await db.games.create_index([("name_lower", 1), ("id", 1)])
+        await db.games.create_index([("rating", 1), ("id", 1)])
+        await db.games.create_index([("trophies_earned", 1), ("id", 1)])
+        await db.games.create_index([("completion_status", 1), ("created_at", 1), ("id", 1)])
+        await db.games.create_index([("platinum_status", 1), ("created_at", 1), ("id", 1)])
+        await db.games.create_index([("completion_status", 1), ("rating", 1), ("id", 1)])
+        await db.games.create_index([("minutes_played", 1), ("id", 1)])
+        if idempotency_store is not None:
+            await idempotency_store.setup()
         logger.info("Ensured indices for collections.")
     except Exception as e:
         logger.exception("Error creating indices: %s", e)
+    await event_hub.start(db, EVENT_COLLECTIONS)
+    if BACKFILL_SERIES_AGGREGATES:
+        try:
+            backfilled = await backfill_series_aggregates(db.game_series)
+            if backfilled:
+                logger.info("Backfilled aggregates on %d game series.", backfilled)
+        except Exception as e:
+            logger.exception("Error backfilling game series aggregates: %s", e)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if write_behind is not None:
+        await write_behind.stop()
+    await revisions.stop()
+    await event_hub.stop()
     client.close()
@@ -0,0 +1,106 @@
+"""
+Single-flight coalescing of concurrent identical GET requests.
+
+When a request arrives while an identical one (same path, same query
+parameters in any order, same conditional and encoding headers) is still
+being handled, it does not run the route again: it waits for the in-flight
+request and replays its status, headers and serialized body. Under a burst
+of clients polling the same list or document, Mongo sees one query and the
+response is serialized once.
+
+Only completed requests are shared, never cached: once the leader finishes
+the next request starts a new flight. Writes call forget(), so a request
+that arrives after a write never joins a read that started before it.
+"""
+
+import asyncio
+import re
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from metrics import registry
+
+# Request headers that can change the response, and so are part of the key
+KEY_HEADERS = (b"accept", b"accept-encoding", b"if-none-match")
+
+singleflight_requests_total = registry.counter(
+    "singleflight_requests_total", "Coalescible GET requests by route template and whether they ran or waited.",
+    ("route", "result"),
+)
+
+
+def template_pattern(template: str) -> re.Pattern:
+    """Regex matching the paths of a route template such as /api/games/{game_id}."""
+    parts = re.split(r"\{[^}]+\}", template)
+    return re.compile("^" + "[^/]+".join(re.escape(part) for part in parts) + "$")
+
+
+class SingleFlight:
+    """In-flight GET requests to the given route templates, by request key."""
+
+    def __init__(self, routes: Iterable[str], enabled: bool = True):
+        self.enabled = enabled
+        self.routes = [(template_pattern(template), template) for template in routes]
+        self.flights: Dict[Tuple, asyncio.Future] = {}
+
+    def forget(self):
+        """Make requests arriving from now on start new flights (call after writes)."""
+        self.flights.clear()
+
+    def route(self, scope) -> Optional[str]:
+        if not self.enabled or scope["type"] != "http" or scope["method"] != "GET":
+            return None
+        for pattern, template in self.routes:
+            if pattern.match(scope["path"]):
+                return template
+        return None
+
+    @staticmethod
+    def key(scope) -> Tuple:
+        query = tuple(sorted(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)))
+        headers = tuple(sorted((k, v) for k, v in scope["headers"] if k in KEY_HEADERS))
+        return scope["path"], query, headers
+
+
+class SingleFlightMiddleware:
+    """ASGI middleware coalescing concurrent identical GETs tracked by `single_flight`."""
+
+    def __init__(self, app, single_flight: SingleFlight):
+        self.app = app
+        self.single_flight = single_flight
+
+    async def __call__(self, scope, receive, send):
+        route = self.single_flight.route(scope)
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+        flights = self.single_flight.flights
+        key = self.single_flight.key(scope)
+        flight = flights.get(key)
+        if flight is not None:
+            response = await asyncio.shield(flight)
+            if response is not None:
+                singleflight_requests_total.inc(route, "coalesced")
+                scope["route_template"] = route
+                for message in response:
+                    await send(message)
+                return
+            # The leader failed; handle this request on its own
+
+        flight = asyncio.get_running_loop().create_future()
+        flights[key] = flight
+        singleflight_requests_total.inc(route, "leader")
+        messages = []
+
+        async def record(message):
+            messages.append(message)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, record)
+        finally:
+            if flights.get(key) is flight:
+                del flights[key]
+            complete = bool(messages) and messages[-1]["type"] == "http.response.body" \
+                and not messages[-1].get("more_body", False)
+            flight.set_result(messages if complete else None)
@@ -0,0 +1,170 @@
+"""
+Slow-query log with automatic explain("executionStats") capture.
+
+A PyMongo CommandListener watches command durations. When a query command
+takes longer than the threshold, the slow query is logged and, within a rate
+limit, the same command is re-run as an explain on the app's event loop. The
+explain summary (winning plan stages, keys/docs examined vs returned) is
+logged next to it, so a COLLSCAN or an index that examines far more
+documents than it returns shows up in the logs.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from bson import SON, json_util
+from pymongo import monitoring
+
+from metrics import registry
+
+logger = logging.getLogger("slow_queries")
+
+# Command name -> where its filter lives in the command document
+EXPLAINABLE = {
+    "find": lambda cmd: cmd.get("filter", {}),
+    "aggregate": lambda cmd: cmd.get("pipeline", []),
+    "count": lambda cmd: cmd.get("query", {}),
+    "distinct": lambda cmd: cmd.get("query", {}),
+    "findAndModify": lambda cmd: cmd.get("query", {}),
+    "update": lambda cmd: [u.get("q") for u in cmd.get("updates", [])],
+    "delete": lambda cmd: [d.get("q") for d in cmd.get("deletes", [])],
+}
+
+slow_queries_total = registry.counter(
+    "mongodb_slow_queries_total", "MongoDB commands slower than the slow-query threshold.",
+    ("collection", "command"),
+)
+slow_query_explains_total = registry.counter(
+    "mongodb_slow_query_explains_total", "Explains captured for slow queries, by result.", ("result",),
+)
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` events per `per` seconds."""
+
+    def __init__(self, rate: int, per: float = 60.0):
+        self.rate = rate
+        self.per = per
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.per)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+def _explainable_command(command: dict) -> SON:
+    """Strip session, cluster time and other driver-added fields from a command."""
+    return SON((k, v) for k, v in command.items() if not k.startswith("$") and k not in ("lsid", "txnNumber"))
+
+
+def _plan_stages(plan: dict) -> str:
+    # Slot-based (SBE) plans nest the classic stage tree under queryPlan
+    plan = plan.get("queryPlan", plan)
+    stages = []
+    while plan:
+        stages.append(plan.get("stage", "?"))
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return ">".join(stages)
+
+
+def summarize_explain(explain: dict) -> dict:
+    planner = explain.get("queryPlanner")
+    if planner is None and explain.get("stages"):
+        planner = explain["stages"][0].get("$cursor", {}).get("queryPlanner", {})
+        stats = explain["stages"][0].get("$cursor", {}).get("executionStats", {})
+    else:
+        stats = explain.get("executionStats", {})
+    stages = _plan_stages((planner or {}).get("winningPlan", {}))
+    return {
+        "plan": stages,
+        "collscan": "COLLSCAN" in stages,
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "returned": stats.get("nReturned"),
+        "execution_ms": stats.get("executionTimeMillis"),
+    }
+
+
+class SlowQueryLog(monitoring.CommandListener):
+    """Log commands slower than `threshold_ms` and explain a rate-limited sample of them."""
+
+    def __init__(self, threshold_ms: float, explains_per_minute: int):
+        self.threshold_ms = threshold_ms
+        self.limiter = RateLimiter(explains_per_minute)
+        self._pending: Dict[Tuple, dict] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client = None
+        self._tasks = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def attach(self, loop: asyncio.AbstractEventLoop, client):
+        """Give the listener an event loop and Motor client to run explains with."""
+        self._loop = loop
+        self._client = client
+
+    def started(self, event):
+        if not self.enabled or event.command_name not in EXPLAINABLE:
+            return
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = event.command
+
+    def failed(self, event):
+        with self._lock:
+            self._pending.pop((event.connection_id, event.request_id), None)
+
+    def succeeded(self, event):
+        with self._lock:
+            command = self._pending.pop((event.connection_id, event.request_id), None)
+        if command is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < self.threshold_ms:
+            return
+        collection = command.get(event.command_name)
+        slow_queries_total.inc(str(collection), event.command_name)
+        query = EXPLAINABLE[event.command_name](command)
+        # Every slow command is logged; only the explain is rate limited
+        if self._loop is None or self._client is None or not self.limiter.allow():
+            self._log(event, collection, duration_ms, query, None)
+            return
+        self._loop.call_soon_threadsafe(self._spawn_explain, event, collection, duration_ms, query, command)
+
+    def _spawn_explain(self, *args):
+        task = self._loop.create_task(self._explain(*args))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, event, collection, duration_ms: float, query, command: dict):
+        try:
+            explain = await self._client[event.database_name].command(
+                SON([("explain", _explainable_command(command)), ("verbosity", "executionStats")])
+            )
+            summary = summarize_explain(explain)
+            slow_query_explains_total.inc("ok")
+        except Exception as e:  # explain is best effort and must never break the app
+            summary = {"error": str(e)}
+            slow_query_explains_total.inc("error")
+        self._log(event, collection, duration_ms, query, summary)
+
+    @staticmethod
+    def _log(event, collection, duration_ms: float, query, summary: Optional[dict]):
+        logger.warning(
+            "Slow %s on %s.%s took %.1f ms; filter=%s; explain=%s",
+            event.command_name, event.database_name, collection, duration_ms,
+            json_util.dumps(query), summary,
+        )
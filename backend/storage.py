@@ -0,0 +1,823 @@
+"""
+Storage engines behind the API routes.
+
+The routes in server.py talk to MongoDB through Motor's collection API. This
+module keeps that API as the repository interface and adds two engines that
+implement the subset of it the routes use, so the app can run without a
+reachable Mongo:
+
+- "mongo":  Motor, unchanged (the default).
+- "memory": documents in process memory, for benchmarks and load tests.
+- "sqlite": one JSON document per row in a local SQLite file (WAL, JSON1),
+            for small read-heavy deployments.
+
+Select the engine with STORAGE_ENGINE; see open_database(). Both local
+engines run every operation inline on the event loop, which also makes each
+single-document operation atomic, as it is in Mongo.
+
+Supported query operators: equality (including dotted paths into arrays),
+$eq $ne $gt $gte $lt $lte $in $nin $exists $regex $and $or $text. Update
+operators: $set (with the positional $), $unset, $inc, $push ($each),
+$pull, $setOnInsert. Projections: inclusion/exclusion of top-level fields,
+$slice and $elemMatch.
+"""
+
+import copy
+import re
+import sqlite3
+from datetime import datetime
+from typing import Any, Iterable, List, Optional, Tuple
+
+from bson import ObjectId, json_util
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo.results import (
+    BulkWriteResult,
+    DeleteResult,
+    InsertManyResult,
+    InsertOneResult,
+    UpdateResult,
+)
+
+ENGINES = ("mongo", "memory", "sqlite")
+
+_MISSING = object()
+
+
+# --- Values -----------------------------------------------------------------
+
+def _normalize(value):
+    """Store values the way BSON would: datetimes are truncated to milliseconds."""
+    if isinstance(value, datetime):
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def _type_rank(value) -> int:
+    # BSON comparison order, reduced to the types this app stores
+    if value is None or value is _MISSING:
+        return 1
+    if isinstance(value, bool):
+        return 8
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    if isinstance(value, dict):
+        return 4
+    if isinstance(value, list):
+        return 5
+    if isinstance(value, ObjectId):
+        return 7
+    if isinstance(value, datetime):
+        return 9
+    return 6
+
+
+def _sort_key(value):
+    rank = _type_rank(value)
+    if rank in (1, 4, 5):
+        return rank, 0
+    return rank, value
+
+
+def _comparable(a, b) -> bool:
+    return _type_rank(a) == _type_rank(b) and _type_rank(a) not in (1, 4, 5)
+
+
+def _equals(a, b) -> bool:
+    # BSON booleans never equal numbers, unlike Python's True == 1
+    if isinstance(a, bool) or isinstance(b, bool):
+        return a is b
+    return a == b
+
+
+def _resolve(doc, path: str) -> list:
+    """All values found at a dotted path, descending into arrays like Mongo does."""
+    values = [doc]
+    for part in path.split("."):
+        found = []
+        for value in values:
+            if isinstance(value, dict):
+                if part in value:
+                    found.append(value[part])
+            elif isinstance(value, list):
+                if part.isdigit() and int(part) < len(value):
+                    found.append(value[int(part)])
+                found.extend(item[part] for item in value if isinstance(item, dict) and part in item)
+        values = found
+    return values
+
+
+def _candidates(values: list) -> list:
+    """Values to compare against: each value, plus the elements of array values."""
+    out = []
+    for value in values:
+        out.append(value)
+        if isinstance(value, list):
+            out.extend(value)
+    return out
+
+
+# --- Queries ----------------------------------------------------------------
+
+def _match_condition(values: list, condition) -> bool:
+    if not (isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition)):
+        return _match_operator(values, "$eq", condition, {})
+    return all(_match_operator(values, op, arg, condition) for op, arg in condition.items())
+
+
+def _match_operator(values: list, op: str, arg, condition: dict) -> bool:
+    candidates = _candidates(values)
+    if op == "$eq":
+        if arg is None:
+            return not values or any(c is None for c in candidates)
+        return any(_equals(c, arg) for c in candidates)
+    if op == "$ne":
+        return not _match_operator(values, "$eq", arg, condition)
+    if op in ("$gt", "$gte", "$lt", "$lte"):
+        compare = {
+            "$gt": lambda a: a > arg, "$gte": lambda a: a >= arg,
+            "$lt": lambda a: a < arg, "$lte": lambda a: a <= arg,
+        }[op]
+        return any(_comparable(c, arg) and compare(c) for c in candidates)
+    if op == "$in":
+        return any(_match_operator(values, "$eq", item, condition) for item in arg)
+    if op == "$nin":
+        return not _match_operator(values, "$in", arg, condition)
+    if op == "$exists":
+        return bool(values) == bool(arg)
+    if op == "$regex":
+        flags = 0
+        for option in condition.get("$options", ""):
+            flags |= {"i": re.I, "m": re.M, "s": re.S, "x": re.X}.get(option, 0)
+        pattern = re.compile(arg if isinstance(arg, str) else arg.pattern, flags)
+        return any(isinstance(c, str) and pattern.search(c) for c in candidates)
+    if op == "$options":
+        return True
+    if op == "$elemMatch":
+        return any(isinstance(c, dict) and matches(c, arg) for v in values if isinstance(v, list) for c in v)
+    raise OperationFailure(f"Unsupported query operator {op}")
+
+
+def matches(doc: dict, query: Optional[dict], text_fields: Tuple[str, ...] = ()) -> bool:
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            if not all(matches(doc, sub, text_fields) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, sub, text_fields) for sub in condition):
+                return False
+        elif key == "$text":
+            if not _match_text(doc, condition.get("$search", ""), text_fields):
+                return False
+        elif not _match_condition(_resolve(doc, key), condition):
+            return False
+    return True
+
+
+def _match_text(doc: dict, search: str, text_fields: Tuple[str, ...]) -> bool:
+    if not text_fields:
+        raise OperationFailure("text index required for $text query")
+    terms = set(re.findall(r"\w+", search.lower()))
+    words = set()
+    for field in text_fields:
+        for value in _resolve(doc, field):
+            if isinstance(value, str):
+                words.update(re.findall(r"\w+", value.lower()))
+    return bool(terms & words)
+
+
+def sort_documents(items: list, sort: Optional[List[Tuple[str, int]]], doc=lambda item: item) -> list:
+    """Sort in place by a Mongo sort spec; `doc` extracts the document from each item."""
+    for field, direction in reversed(sort or []):
+        def key(item, field=field):
+            values = _resolve(doc(item), field)
+            return _sort_key(values[0] if values else None)
+        items.sort(key=key, reverse=direction == -1)
+    return items
+
+
+def _pick(value, parts: list):
+    """The value at a dotted path, keeping the enclosing documents (and arrays) around it."""
+    if isinstance(value, list):
+        return [_pick(item, parts) for item in value if isinstance(item, dict)]
+    head, rest = parts[0], parts[1:]
+    if head not in value or rest and not isinstance(value[head], (dict, list)):
+        return {}
+    return {head: _pick(value[head], rest) if rest else value[head]}
+
+
+def _merge(a, b):
+    if isinstance(a, dict) and isinstance(b, dict):
+        for key, value in b.items():
+            a[key] = _merge(a[key], value) if key in a else value
+        return a
+    if isinstance(a, list) and isinstance(b, list):
+        return [_merge(x, y) for x, y in zip(a, b)]
+    return b
+
+
+def project(doc: dict, projection: Optional[dict]) -> dict:
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    include_id = projection.get("_id", 1) not in (0, False)
+    included = [
+        k for k, v in projection.items()
+        if k != "_id" and (v in (1, True) or isinstance(v, dict) and "$elemMatch" in v)
+    ]
+    if included:
+        out = {k: doc[k] for k in doc if k in projection and k != "_id"}
+        for path in included:
+            if "." in path:
+                out = _merge(out, _pick(doc, path.split(".")))
+        if include_id and "_id" in doc:
+            out = {"_id": doc["_id"], **out}
+    else:
+        out = {k: v for k, v in doc.items() if projection.get(k, 1) not in (0, False)}
+        if not include_id:
+            out.pop("_id", None)
+    for field, spec in projection.items():
+        if not isinstance(spec, dict) or not isinstance(out.get(field), list):
+            continue
+        if "$slice" in spec:
+            window = spec["$slice"]
+            if isinstance(window, list):
+                skip, limit = window
+                out[field] = out[field][skip:skip + limit] if skip >= 0 else out[field][skip:][:limit]
+            else:
+                out[field] = out[field][:window] if window >= 0 else out[field][window:]
+        elif "$elemMatch" in spec:
+            found = [item for item in out[field] if isinstance(item, dict) and matches(item, spec["$elemMatch"])]
+            if found:
+                out[field] = found[:1]
+            else:
+                del out[field]
+    return out
+
+
+# --- Updates ----------------------------------------------------------------
+
+def _positional_index(doc: dict, array_path: str, query: dict) -> int:
+    """Index of the first element of `array_path` matched by the query (for `$`)."""
+    prefix = array_path + "."
+    sub_query = {k[len(prefix):]: v for k, v in query.items() if k.startswith(prefix)}
+    element_match = query.get(array_path)
+    if isinstance(element_match, dict) and "$elemMatch" in element_match:
+        sub_query = {"$and": [sub_query, element_match["$elemMatch"]]}
+    array = _resolve(doc, array_path)
+    items = array[0] if array and isinstance(array[0], list) else []
+    for index, item in enumerate(items):
+        if isinstance(item, dict) and matches(item, sub_query):
+            return index
+    raise OperationFailure("The positional operator did not find the match needed from the query.")
+
+
+def _walk(doc: dict, path: str, query: dict, create: bool, original: dict):
+    """Return (container, last key) for a dotted path, resolving the positional $.
+
+    Like Mongo, the positional $ refers to the element matched in the document
+    as it was before the update, not as modified by earlier fields.
+    """
+    parts = path.split(".")
+    target = doc
+    for i, part in enumerate(parts[:-1]):
+        if part == "$":
+            part = _positional_index(original, ".".join(parts[:i]), query)
+        if isinstance(target, list):
+            target = target[int(part)]
+            continue
+        if part not in target:
+            if not create:
+                return None, None
+            target[part] = {}
+        target = target[part]
+    last = parts[-1]
+    if last == "$":
+        last = _positional_index(original, ".".join(parts[:-1]), query)
+    elif isinstance(target, list):
+        last = int(last)
+    return target, last
+
+
+def apply_update(doc: dict, update: dict, query: dict, inserting: bool = False) -> dict:
+    original, doc = doc, copy.deepcopy(doc)
+    for op, fields in update.items():
+        if op == "$setOnInsert" and not inserting:
+            continue
+        for path, value in fields.items():
+            if path == "_id" and op != "$setOnInsert" and not inserting:
+                raise OperationFailure("Performing an update on the path '_id' would modify the immutable field '_id'")
+            container, key = _walk(doc, path, query, op != "$unset", original)
+            if container is None:
+                continue
+            value = _normalize(value)
+            if op in ("$set", "$setOnInsert"):
+                container[key] = value
+            elif op == "$unset":
+                if isinstance(container, dict):
+                    container.pop(key, None)
+            elif op == "$inc":
+                container[key] = container.get(key, 0) + value if isinstance(container, dict) else container[key] + value
+            elif op == "$push":
+                items = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                container.setdefault(key, []).extend(items)
+            elif op == "$pull":
+                current = container.get(key, [])
+                if isinstance(value, dict) and not all(k.startswith("$") for k in value):
+                    container[key] = [item for item in current if not (isinstance(item, dict) and matches(item, value))]
+                else:
+                    container[key] = [item for item in current if not _match_condition([item], value)]
+            else:
+                raise OperationFailure(f"Unsupported update operator {op}")
+    return doc
+
+
+def _upsert_seed(query: dict) -> dict:
+    return {k: v for k, v in query.items() if not k.startswith("$") and "." not in k and not isinstance(v, dict)}
+
+
+# --- Collections ------------------------------------------------------------
+
+class LocalCursor:
+    """The part of Motor's cursor API used by the routes: sort/skip/limit, to_list, async for."""
+
+    def __init__(self, collection, query: Optional[dict], projection: Optional[dict]):
+        self._collection = collection
+        self._query = query or {}
+        self._projection = projection
+        self._sort = None
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key_or_list, direction: int = 1):
+        self._sort = key_or_list if isinstance(key_or_list, list) else [(key_or_list, direction)]
+        return self
+
+    def skip(self, skip: int):
+        self._skip = skip
+        return self
+
+    def limit(self, limit: int):
+        self._limit = limit
+        return self
+
+    def batch_size(self, batch_size: int):
+        return self
+
+    def _results(self) -> list:
+        docs = self._collection._find(self._query)
+        sort_documents(docs, self._sort)
+        docs = docs[self._skip:self._skip + self._limit if self._limit else None]
+        return [project(doc, self._projection) for doc in docs]
+
+    async def to_list(self, length: Optional[int] = None) -> list:
+        results = self._results()
+        return results[:length] if length else results
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._results():
+            yield doc
+
+    async def explain(self) -> dict:
+        return {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}, "executionStats": {}}
+
+
+class LocalCollection:
+    """Motor-compatible collection over an engine-specific document store.
+
+    Subclasses provide _candidates(query) (an iterable of (key, document) that
+    is a superset of the matches), _insert_docs, _replace_doc, _delete_doc and
+    _clear. Matching, sorting, projections and update operators are shared.
+    """
+
+    def __init__(self, database, name: str):
+        self.database = database
+        self.name = name
+        self._unique = set()
+        self._text_fields: Tuple[str, ...] = ()
+
+    # engine primitives
+    def _candidates(self, query: dict) -> Iterable[Tuple[Any, dict]]:
+        raise NotImplementedError
+
+    def _insert_docs(self, docs: List[dict]):
+        raise NotImplementedError
+
+    def _replace_doc(self, key, doc: dict):
+        raise NotImplementedError
+
+    def _delete_doc(self, key):
+        raise NotImplementedError
+
+    def _clear(self):
+        raise NotImplementedError
+
+    # shared implementation
+    def _matching(self, query: Optional[dict]) -> Iterable[Tuple[Any, dict]]:
+        for key, doc in self._candidates(query or {}):
+            if matches(doc, query, self._text_fields):
+                yield key, doc
+
+    def _find(self, query: Optional[dict]) -> list:
+        return [doc for _, doc in self._matching(query)]
+
+    def _first(self, query: Optional[dict], sort=None):
+        if sort:
+            found = sort_documents(list(self._matching(query)), sort, doc=lambda item: item[1])
+            return found[0] if found else (None, None)
+        return next(self._matching(query), (None, None))
+
+    def _check_unique(self, doc: dict, key=None):
+        for field in self._unique:
+            if field in doc:
+                for other_key, _ in self._matching({field: doc[field]}):
+                    if other_key != key:
+                        raise DuplicateKeyError(
+                            f"E11000 duplicate key error collection: {self.name} dup key: {{ {field}: {doc[field]!r} }}",
+                            11000,
+                        )
+
+    def _prepare(self, doc: dict) -> dict:
+        doc = _normalize(copy.deepcopy(doc))
+        if "_id" not in doc:
+            doc = {"_id": ObjectId(), **doc}
+        self._check_unique(doc)
+        return doc
+
+    def find(self, filter: Optional[dict] = None, projection: Optional[dict] = None, **kwargs) -> LocalCursor:
+        cursor = LocalCursor(self, filter, projection)
+        if "sort" in kwargs:
+            cursor.sort(kwargs["sort"])
+        return cursor.skip(kwargs.get("skip", 0)).limit(kwargs.get("limit", 0))
+
+    async def find_one(self, filter: Optional[dict] = None, projection: Optional[dict] = None, **kwargs):
+        docs = await self.find(filter, projection, limit=1, **kwargs).to_list(1)
+        return docs[0] if docs else None
+
+    async def count_documents(self, filter: Optional[dict] = None, **kwargs) -> int:
+        return sum(1 for _ in self._matching(filter))
+
+    async def estimated_document_count(self, **kwargs) -> int:
+        return sum(1 for _ in self._candidates({}))
+
+    async def insert_one(self, document: dict, **kwargs) -> InsertOneResult:
+        doc = self._prepare(document)
+        self._insert_docs([doc])
+        document.setdefault("_id", doc["_id"])
+        return InsertOneResult(doc["_id"], True)
+
+    async def insert_many(self, documents: List[dict], ordered: bool = True, **kwargs) -> InsertManyResult:
+        result = await self.bulk_write([InsertOne(doc) for doc in documents], ordered=ordered)
+        return InsertManyResult([doc.get("_id") for doc in documents], result.acknowledged)
+
+    def _update(self, query: dict, update: dict, upsert: bool, sort=None):
+        """Apply `update` to the first match; returns (before, after, upserted_id)."""
+        key, doc = self._first(query, sort)
+        if doc is None:
+            if not upsert:
+                return None, None, None
+            new = apply_update(_upsert_seed(query), update, query, inserting=True)
+            new = self._prepare(new)
+            self._insert_docs([new])
+            return None, new, new["_id"]
+        new = apply_update(doc, update, query)
+        self._check_unique(new, key)
+        self._replace_doc(key, new)
+        return doc, new, None
+
+    async def update_one(self, filter: dict, update: dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        before, after, upserted_id = self._update(filter, update, upsert)
+        raw = {"n": 1 if after is not None else 0, "nModified": int(before is not None and before != after)}
+        if upserted_id is not None:
+            raw["upserted"] = upserted_id
+        return UpdateResult(raw, True)
+
+    async def update_many(self, filter: dict, update: dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        matched = modified = 0
+        for key, doc in list(self._matching(filter)):
+            new = apply_update(doc, update, filter)
+            self._replace_doc(key, new)
+            matched += 1
+            modified += new != doc
+        if not matched and upsert:
+            return await self.update_one(filter, update, upsert=True)
+        return UpdateResult({"n": matched, "nModified": modified}, True)
+
+    async def find_one_and_update(self, filter: dict, update: dict, projection: Optional[dict] = None,
+                                  sort=None, upsert: bool = False, return_document: bool = False, **kwargs):
+        before, after, _ = self._update(filter, update, upsert, sort)
+        doc = after if return_document else before
+        return project(doc, projection) if doc is not None else None
+
+    async def delete_one(self, filter: dict, **kwargs) -> DeleteResult:
+        key, doc = self._first(filter)
+        if doc is not None:
+            self._delete_doc(key)
+        return DeleteResult({"n": int(doc is not None)}, True)
+
+    async def delete_many(self, filter: dict, **kwargs) -> DeleteResult:
+        keys = [key for key, _ in self._matching(filter)]
+        for key in keys:
+            self._delete_doc(key)
+        return DeleteResult({"n": len(keys)}, True)
+
+    async def bulk_write(self, requests: list, ordered: bool = True, **kwargs) -> BulkWriteResult:
+        counts = {"nInserted": 0, "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []}
+        errors = []
+        with self.database._batch():
+            for index, request in enumerate(requests):
+                try:
+                    if isinstance(request, InsertOne):
+                        doc = self._prepare(request._doc)
+                        self._insert_docs([doc])
+                        request._doc.setdefault("_id", doc["_id"])
+                        counts["nInserted"] += 1
+                    elif isinstance(request, UpdateOne):
+                        before, after, upserted_id = self._update(request._filter, request._doc, request._upsert)
+                        if upserted_id is not None:
+                            counts["nUpserted"] += 1
+                            counts["upserted"].append({"index": index, "_id": upserted_id})
+                        elif after is not None:
+                            counts["nMatched"] += 1
+                            counts["nModified"] += int(before != after)
+                    elif isinstance(request, DeleteOne):
+                        counts["nRemoved"] += (await self.delete_one(request._filter)).deleted_count
+                    else:
+                        raise OperationFailure(f"Unsupported bulk operation {type(request).__name__}")
+                except (DuplicateKeyError, OperationFailure) as e:
+                    errors.append({"index": index, "code": e.code or 2, "errmsg": str(e), "op": request})
+                    if ordered:
+                        break
+        if errors:
+            raise BulkWriteError({**counts, "writeErrors": errors, "writeConcernErrors": []})
+        return BulkWriteResult(counts, True)
+
+    async def create_index(self, keys, unique: bool = False, name: Optional[str] = None, **kwargs) -> str:
+        keys = [(keys, 1)] if isinstance(keys, str) else list(keys)
+        text_fields = tuple(field for field, kind in keys if kind == "text")
+        if text_fields:
+            self._text_fields = text_fields
+        elif unique:
+            if len(keys) != 1:
+                raise OperationFailure("Only single-field unique indexes are supported by this engine")
+            self._unique.add(keys[0][0])
+        self._create_index(keys, unique)
+        return name or "_".join(f"{field}_{kind}" for field, kind in keys)
+
+    def _create_index(self, keys: list, unique: bool):
+        pass
+
+    async def drop(self):
+        self._clear()
+
+    def aggregate(self, pipeline: list, **kwargs):
+        raise OperationFailure(f"aggregate() is not supported by the {self.database.engine} engine")
+
+    def watch(self, *args, **kwargs):
+        raise OperationFailure(f"Change streams are not supported by the {self.database.engine} engine")
+
+
+class LocalDatabase:
+    """Motor-compatible database: db.games and db["games"] return collections."""
+
+    engine = "local"
+    collection_class = LocalCollection
+
+    def __init__(self, name: str):
+        self.name = name
+        self._collections = {}
+
+    @property
+    def client(self):
+        return self
+
+    def __getitem__(self, name: str):
+        if name not in self._collections:
+            self._collections[name] = self.collection_class(self, name)
+        return self._collections[name]
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def _batch(self):
+        return _NoBatch()
+
+    async def command(self, *args, **kwargs):
+        raise OperationFailure(f"Database commands are not supported by the {self.engine} engine")
+
+    def close(self):
+        pass
+
+
+class _NoBatch:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+# --- In-memory engine -------------------------------------------------------
+
+class MemoryCollection(LocalCollection):
+    def __init__(self, database, name: str):
+        super().__init__(database, name)
+        self._docs = {}
+        self._by_id = {}  # app-level "id" -> _id, for the hot lookups
+
+    def _candidates(self, query: dict):
+        for field, index in (("_id", None), ("id", self._by_id)):
+            value = query.get(field, _MISSING)
+            if value is _MISSING or isinstance(value, dict) and set(value) != {"$in"}:
+                continue
+            wanted = value["$in"] if isinstance(value, dict) else [value]
+            keys = wanted if index is None else [index.get(v) for v in wanted if isinstance(v, str)]
+            return [(key, self._docs[key]) for key in keys if key in self._docs]
+        return list(self._docs.items())
+
+    def _insert_docs(self, docs: List[dict]):
+        for doc in docs:
+            if doc["_id"] in self._docs:
+                raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} dup key: _id", 11000)
+            self._docs[doc["_id"]] = doc
+            if isinstance(doc.get("id"), str):
+                self._by_id[doc["id"]] = doc["_id"]
+
+    def _replace_doc(self, key, doc: dict):
+        old = self._docs[key]
+        if old.get("id") != doc.get("id"):
+            self._by_id.pop(old.get("id"), None)
+        self._docs[key] = doc
+        if isinstance(doc.get("id"), str):
+            self._by_id[doc["id"]] = key
+
+    def _delete_doc(self, key):
+        doc = self._docs.pop(key)
+        self._by_id.pop(doc.get("id"), None)
+
+    def _clear(self):
+        self._docs.clear()
+        self._by_id.clear()
+
+
+class MemoryDatabase(LocalDatabase):
+    engine = "memory"
+    collection_class = MemoryCollection
+
+
+# --- SQLite engine ----------------------------------------------------------
+
+_JSON_OPTIONS = json_util.JSONOptions(json_mode=json_util.JSONMode.RELAXED, tz_aware=False)
+_SCALAR_FIELD = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_SQL_OPERATORS = {"$eq": "=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+
+def _encode(doc: dict) -> str:
+    return json_util.dumps(doc, json_options=_JSON_OPTIONS)
+
+
+def _decode(text: str) -> dict:
+    return json_util.loads(text, json_options=_JSON_OPTIONS)
+
+
+class SQLiteCollection(LocalCollection):
+    """Documents as JSON text in a table with the app-level id as an indexed column.
+
+    Lookups by id/_id use the indexed columns. Simple conditions on other
+    top-level fields are pushed down to SQL with json_extract() as a
+    prefilter that never drops a document Mongo would match (array and object
+    values always pass it); the shared matcher then applies the exact query
+    semantics.
+    """
+
+    def __init__(self, database, name: str):
+        super().__init__(database, name)
+        self.table = '"c_' + name.replace('"', '""') + '"'
+        self._conn = database._conn
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "pk TEXT PRIMARY KEY, id TEXT, doc TEXT NOT NULL CHECK (json_valid(doc)))"
+        )
+        self._conn.execute(f'CREATE INDEX IF NOT EXISTS "ix_{name}_id" ON {self.table} (id)')
+
+    def _where(self, query: dict) -> Tuple[str, list]:
+        clauses, params = [], []
+        for field, condition in query.items():
+            if field in ("_id", "id"):
+                column = "pk" if field == "_id" else "id"
+                wanted = condition.get("$in") if isinstance(condition, dict) and set(condition) == {"$in"} else (
+                    None if isinstance(condition, dict) else [condition]
+                )
+                if wanted is None:
+                    continue
+                keys = [_encode(v) if field == "_id" else v for v in wanted]
+                clauses.append(f"{column} IN ({','.join('?' * len(keys))})" if keys else "0")
+                params.extend(keys)
+                continue
+            if field.startswith("$") or not _SCALAR_FIELD.match(field):
+                continue
+            conditions = condition.items() if isinstance(condition, dict) else [("$eq", condition)]
+            for op, value in conditions:
+                if op in _SQL_OPERATORS and isinstance(value, (str, int, float)):
+                    path = f"'$.{field}'"
+                    clauses.append(
+                        f"(json_type(doc, {path}) IN ('array', 'object') "
+                        f"OR json_extract(doc, {path}) {_SQL_OPERATORS[op]} ?)"
+                    )
+                    params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _candidates(self, query: dict):
+        where, params = self._where(query)
+        rows = self._conn.execute(f"SELECT pk, doc FROM {self.table}{where} ORDER BY rowid", params)
+        return [(pk, _decode(doc)) for pk, doc in rows]
+
+    def _insert_docs(self, docs: List[dict]):
+        try:
+            self._conn.executemany(
+                f"INSERT INTO {self.table} (pk, id, doc) VALUES (?, ?, ?)",
+                [(_encode(doc["_id"]), doc.get("id") if isinstance(doc.get("id"), str) else None, _encode(doc))
+                 for doc in docs],
+            )
+        except sqlite3.IntegrityError as e:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name}: {e}", 11000)
+
+    def _replace_doc(self, key, doc: dict):
+        self._conn.execute(
+            f"UPDATE {self.table} SET id = ?, doc = ? WHERE pk = ?",
+            (doc.get("id") if isinstance(doc.get("id"), str) else None, _encode(doc), key),
+        )
+
+    def _delete_doc(self, key):
+        self._conn.execute(f"DELETE FROM {self.table} WHERE pk = ?", (key,))
+
+    def _clear(self):
+        self._conn.execute(f"DELETE FROM {self.table}")
+
+    def _create_index(self, keys: list, unique: bool):
+        if keys == [("id", 1)] and unique:
+            self._conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "ux_{self.name}_id" ON {self.table} (id)')
+
+
+class _SQLiteBatch:
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __enter__(self):
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN")
+            self._owner = True
+        else:
+            self._owner = False
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if self._owner:
+            self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+class SQLiteDatabase(LocalDatabase):
+    engine = "sqlite"
+    collection_class = SQLiteCollection
+
+    def __init__(self, name: str, path: str):
+        super().__init__(name)
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+    def _batch(self):
+        return _SQLiteBatch(self._conn)
+
+    def close(self):
+        self._conn.close()
+
+
+def open_database(engine: str, *, db_name: str, mongo_url: Optional[str] = None,
+                  sqlite_path: Optional[str] = None, binary_ids: bool = False, **mongo_options):
+    """Return the database object the routes use for the configured engine.
+
+    `binary_ids` (mongo only) stores UUID ids as BSON Binary; see binary_ids.py.
+    """
+    if engine == "mongo":
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from binary_ids import ID_TYPE_REGISTRY, BinaryIdDatabase
+        database = AsyncIOMotorClient(mongo_url, type_registry=ID_TYPE_REGISTRY, **mongo_options)[db_name]
+        return BinaryIdDatabase(database) if binary_ids else database
+    if engine == "memory":
+        return MemoryDatabase(db_name)
+    if engine == "sqlite":
+        return SQLiteDatabase(db_name, sqlite_path)
+    raise ValueError(f"Unknown storage engine {engine!r}; expected one of {', '.join(ENGINES)}")
@@ -0,0 +1,205 @@
+"""
+Write-behind batching of single-item inserts.
+
+With WRITE_BEHIND enabled, POST /api/games and POST
+/api/game-series/{id}/games queue their document here instead of writing it
+themselves. The queue is flushed after `max_items` queued writes or
+`max_delay` seconds, whichever comes first:
+
+- inserts become one unordered insert_many per collection;
+- pushes into series become one UpdateOne per series with
+  {$push: {field: {$each: [...]}}} and the summed $inc, all sent as one
+  unordered bulk_write, after a single $in query that finds which series
+  still exist.
+
+Every queued write gets a future resolving to "ok", "not_found" or "error"
+once its batch is written, so a caller can wait for durability or return
+right away. Flushes are serialized, which keeps pushes to one series in
+arrival order; writes queued while a flush runs go out in the next one.
+Pending writes are flushed on shutdown, but a crash loses them: callers that
+need durability wait.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Awaitable, Callable, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from metrics import registry
+
+logger = logging.getLogger("write_behind")
+
+write_behind_items_total = registry.counter(
+    "write_behind_items_total", "Writes queued for write-behind batching, by collection and kind.",
+    ("collection", "kind"),
+)
+write_behind_flush_size = registry.histogram(
+    "write_behind_flush_size", "Writes per write-behind flush.", (), (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+write_behind_failed_total = registry.counter(
+    "write_behind_failed_total", "Queued writes that were not applied, by collection and outcome.",
+    ("collection", "outcome"),
+)
+
+
+class _Entry:
+    __slots__ = ("collection", "doc", "target", "field", "inc", "future")
+
+    def __init__(self, collection, doc: dict, target: Optional[str], field: Optional[str], inc: Optional[dict]):
+        self.collection = collection
+        self.doc = doc
+        self.target = target
+        self.field = field
+        self.inc = inc
+        self.future = asyncio.get_running_loop().create_future()
+
+    def resolve(self, outcome: str):
+        if not self.future.done():
+            self.future.set_result(outcome)
+        if outcome != "ok":
+            write_behind_failed_total.inc(self.collection.name, outcome)
+
+
+class WriteBehindQueue:
+    """In-process queue of inserts and $pushes, flushed in batches.
+
+    `on_flush(collection, ids, operation)` runs after each successful write
+    (server.py passes record_write, so caches, ETags and events follow).
+    """
+
+    def __init__(self, max_items: int, max_delay: float, on_flush: Callable[..., Awaitable]):
+        self.max_items = max_items
+        self.max_delay = max_delay
+        self.on_flush = on_flush
+        self._buffer = []
+        self._lock = asyncio.Lock()
+        self._timer = None
+        self._tasks = set()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def insert(self, collection, doc: dict) -> asyncio.Future:
+        return self._enqueue(_Entry(collection, doc, None, None, None), "insert")
+
+    def push(self, collection, target: str, field: str, doc: dict, inc: Optional[dict] = None) -> asyncio.Future:
+        """Queue `doc` for $push into `field` of the document with id `target`, with an optional $inc."""
+        return self._enqueue(_Entry(collection, doc, target, field, inc), "push")
+
+    def _enqueue(self, entry: _Entry, kind: str) -> asyncio.Future:
+        self._buffer.append(entry)
+        write_behind_items_total.inc(entry.collection.name, kind)
+        if len(self._buffer) >= self.max_items:
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._schedule_flush)
+        return entry.future
+
+    def _schedule_flush(self):
+        task = asyncio.get_running_loop().create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self):
+        async with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            batch, self._buffer = self._buffer, []
+            if not batch:
+                return
+            write_behind_flush_size.observe(len(batch))
+            inserts, pushes = defaultdict(list), defaultdict(list)
+            for entry in batch:
+                if entry.target is None:
+                    inserts[entry.collection.name].append(entry)
+                else:
+                    pushes[entry.collection.name].append(entry)
+            for entries in inserts.values():
+                await self._flush_inserts(entries)
+            for entries in pushes.values():
+                await self._flush_pushes(entries)
+
+    async def stop(self):
+        """Flush what is queued and wait for running flushes."""
+        await self.flush()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _written(self, collection, ids: list, operation: str):
+        if not ids:
+            return
+        try:
+            await self.on_flush(collection, *ids, operation=operation)
+        except Exception:
+            logger.exception("Write-behind post-flush hook for %s failed", collection.name)
+
+    async def _flush_inserts(self, entries: list):
+        collection = entries[0].collection
+        failed = set()
+        try:
+            await collection.insert_many([entry.doc for entry in entries], ordered=False)
+        except BulkWriteError as e:
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            logger.error("Write-behind insert into %s: %d of %d failed", collection.name, len(failed), len(entries))
+        except Exception:
+            logger.exception("Write-behind insert of %d documents into %s failed", len(entries), collection.name)
+            failed = set(range(len(entries)))
+        written = [entry for index, entry in enumerate(entries) if index not in failed]
+        await self._written(collection, [entry.doc["id"] for entry in written], "insert")
+        for index, entry in enumerate(entries):
+            entry.resolve("error" if index in failed else "ok")
+
+    async def _flush_pushes(self, entries: list):
+        collection = entries[0].collection
+        groups = defaultdict(list)  # (target, field) -> entries, in arrival order
+        for entry in entries:
+            groups[(entry.target, entry.field)].append(entry)
+        targets = list({target for target, _ in groups})
+        try:
+            existing = {doc["id"] async for doc in collection.find({"id": {"$in": targets}}, {"_id": 0, "id": 1})}
+        except Exception:
+            logger.exception("Write-behind lookup of %d targets in %s failed", len(targets), collection.name)
+            for group in groups.values():
+                for entry in group:
+                    entry.resolve("error")
+            return
+        requests, request_groups = [], []
+        for (target, field), group in groups.items():
+            if target not in existing:
+                logger.warning("Write-behind push into missing %s %s dropped", collection.name, target)
+                for entry in group:
+                    entry.resolve("not_found")
+                continue
+            update = {"$push": {field: {"$each": [entry.doc for entry in group]}}}
+            inc = _sum_incs(entry.inc for entry in group)
+            if inc:
+                update["$inc"] = inc
+            requests.append(UpdateOne({"id": target}, update))
+            request_groups.append(group)
+        if not requests:
+            return
+        failed = set()
+        try:
+            await collection.bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            logger.error("Write-behind push into %s: %d of %d failed", collection.name, len(failed), len(requests))
+        except Exception:
+            logger.exception("Write-behind push of %d updates into %s failed", len(requests), collection.name)
+            failed = set(range(len(requests)))
+        written = [group[0].target for index, group in enumerate(request_groups) if index not in failed]
+        await self._written(collection, written, "update")
+        for index, group in enumerate(request_groups):
+            for entry in group:
+                entry.resolve("error" if index in failed else "ok")
+
+
+def _sum_incs(incs) -> dict:
+    total = defaultdict(int)
+    for inc in incs:
+        for name, value in (inc or {}).items():
+            total[name] += value
+    return {name: value for name, value in total.items() if value}
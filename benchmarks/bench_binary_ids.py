@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Id storage benchmark: UUID strings vs BSON Binary subtype 4 (BINARY_IDS).
+
+Seeds two scratch databases with the same synthetic games and game series,
+one storing ids as strings and one as Binary, creates the server's indexes in
+both (startup_db) and compares collection and index sizes from collStats,
+then times point lookups by id. Requires a reachable MongoDB (MONGO_URL,
+default mongodb://localhost:27017); the scratch databases are dropped
+afterwards. --offline only compares encoded BSON document sizes.
+
+    python benchmarks/bench_binary_ids.py --games 200000 --series 20000 --games-per-series 10
+    python benchmarks/bench_binary_ids.py --offline
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import bson
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ["DB_NAME"] = os.getenv("BENCH_DB_NAME", "emergent_bench")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import server  # noqa: E402
+from binary_ids import BinaryIdDatabase, encode_ids  # noqa: E402
+
+COLLECTIONS = ("games", "game_series")
+
+
+def synthetic(games: int, series: int, per_series: int, seed: int):
+    rng = random.Random(seed)
+
+    def game(i: int) -> dict:
+        hours = rng.randint(0, 300)
+        return server.Game(name=f"Game {i}", rating=rng.randint(1, 10), time_played=f"{hours} hours").dict()
+
+    game_docs = [game(i) for i in range(games)]
+    series_docs = [
+        server.GameSeries(series_name=f"Series {i}", games=[game(i * per_series + j) for j in range(per_series)]).dict()
+        for i in range(series)
+    ]
+    return game_docs, series_docs
+
+
+def encoded_size(docs: list, binary: bool) -> int:
+    return sum(len(bson.encode(encode_ids(doc) if binary else doc)) for doc in docs)
+
+
+async def seed(database, game_docs: list, series_docs: list, batch: int = 5000):
+    server.db = database
+    for name in COLLECTIONS:
+        await database[name].drop()
+    await server.startup_db()
+    for name, docs in (("games", game_docs), ("game_series", series_docs)):
+        for start in range(0, len(docs), batch):
+            # insert a copy: the driver adds _id to the documents it is given
+            await database[name].insert_many([dict(doc) for doc in docs[start:start + batch]])
+
+
+async def sizes(raw_database, name: str) -> dict:
+    stats = await raw_database.command("collStats", name)
+    id_indexes = sum(size for index, size in stats["indexSizes"].items() if index == "id_1" or index.endswith("_id_1"))
+    return {
+        "data": stats["size"],
+        "avg doc": stats["avgObjSize"],
+        "storage": stats["storageSize"],
+        "indexes": stats["totalIndexSize"],
+        "id index": stats["indexSizes"].get("id_1", 0),
+        "indexes on id": id_indexes,
+    }
+
+
+async def time_lookups(database, ids: list, repeat: int) -> float:
+    samples = []
+    for doc_id in ids[:repeat]:
+        started = time.perf_counter()
+        await database.games.find_one({"id": doc_id}, server.READ_PROJECTION)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def print_table(title: str, rows: dict):
+    print(f"\n{title}")
+    print(f"{'':>16} {'string':>14} {'binary':>14} {'change':>8}")
+    for label, (string, binary) in rows.items():
+        change = f"{(binary - string) / string * 100:+.1f}%" if string else "n/a"
+        print(f"{label:>16} {string:>14,.0f} {binary:>14,.0f} {change:>8}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=200_000)
+    parser.add_argument("--series", type=int, default=20_000)
+    parser.add_argument("--games-per-series", type=int, default=10)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--offline", action="store_true", help="only compare BSON sizes, no MongoDB needed")
+    args = parser.parse_args()
+
+    game_docs, series_docs = synthetic(args.games, args.series, args.games_per_series, args.seed)
+    print_table("Encoded BSON bytes", {
+        name: (encoded_size(docs, False), encoded_size(docs, True))
+        for name, docs in (("games", game_docs), ("game_series", series_docs))
+    })
+    if args.offline:
+        return
+
+    base = os.environ["DB_NAME"]
+    raw = {"string": server.client[f"{base}_str"], "binary": server.client[f"{base}_bin"]}
+    databases = {"string": raw["string"], "binary": BinaryIdDatabase(raw["binary"])}
+    for form, database in databases.items():
+        print(f"Seeding {args.games} games and {args.series} series with {form} ids ...")
+        await seed(database, game_docs, series_docs)
+
+    for name in COLLECTIONS:
+        stats = {form: await sizes(raw[form], name) for form in raw}
+        print_table(f"{name} (collStats bytes)", {label: (stats["string"][label], stats["binary"][label])
+                                                   for label in stats["string"]})
+
+    ids = [doc["id"] for doc in random.Random(args.seed).sample(game_docs, min(args.lookups, len(game_docs)))]
+    lookups = {form: await time_lookups(database, ids, args.lookups) for form, database in databases.items()}
+    print(f"\nfind_one by id, median ms: string {lookups['string']:.3f}, binary {lookups['binary']:.3f}")
+
+    await server.event_hub.stop()
+    for database in raw.values():
+        await server.client.drop_database(database.name)
+    server.client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Pagination benchmark: skip/limit vs keyset cursor paging on GET /api/games.
+
+Seeds a scratch database with synthetic games and times single page fetches
+at increasing depths. Requires a reachable MongoDB (MONGO_URL, default
+mongodb://localhost:27017); the scratch database is dropped afterwards.
+
+    python benchmarks/bench_pagination.py --docs 120000 --offsets 0 10000 100000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ["DB_NAME"] = os.getenv("BENCH_DB_NAME", "emergent_bench")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from fastapi import Response  # noqa: E402
+
+import server  # noqa: E402
+
+
+async def seed(count: int, batch: int = 5000):
+    await server.db.games.drop()
+    await server.startup_db()
+    for start in range(0, count, batch):
+        docs = [
+            server.Game(name=f"Game {i}", rating=(i % 10) + 1).dict()
+            for i in range(start, min(start + batch, count))
+        ]
+        await server.db.games.insert_many(docs)
+
+
+async def time_page(limit: int, skip: int = 0, cursor: str = None, repeat: int = 20) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await server.fetch_page(server.db.games, Response(), limit, skip, cursor)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=120_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--offsets", type=int, nargs="+", default=[0, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"Seeding {args.docs} games into {os.environ['DB_NAME']} ...")
+    await seed(args.docs)
+
+    print(f"{'offset':>10} {'skip ms':>10} {'cursor ms':>10}")
+    for offset in args.offsets:
+        if offset >= args.docs:
+            print(f"{offset:>10} {'n/a':>10} {'n/a':>10}")
+            continue
+        cursor = None
+        if offset:
+            # Resolve the cursor for this depth once, outside the timed loop
+            anchor = await server.db.games.find().sort(server.PAGE_SORT).skip(offset - 1).limit(1).to_list(1)
+            cursor = server.encode_cursor(anchor[0])
+        skip_ms = await time_page(args.limit, skip=offset, repeat=args.repeat)
+        cursor_ms = await time_page(args.limit, cursor=cursor, repeat=args.repeat)
+        print(f"{offset:>10} {skip_ms:>10.2f} {cursor_ms:>10.2f}")
+
+    await server.db.games.drop()
+    server.client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
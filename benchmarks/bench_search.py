@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Search benchmark: server-side filter/sort on GET /api/games over a large library.
+
+Seeds a scratch database with synthetic games (500k by default), ensures the
+indexes from startup_db and times representative search requests end to end
+through the ASGI app. The winning plan stage of each underlying query is
+printed next to its latency so missing indexes stand out. Requires a
+reachable MongoDB (MONGO_URL, default mongodb://localhost:27017).
+
+    python benchmarks/bench_search.py --docs 500000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ["DB_NAME"] = os.getenv("BENCH_DB_NAME", "emergent_bench")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import httpx  # noqa: E402
+
+import server  # noqa: E402
+
+WORDS = ["Dark", "Souls", "Legend", "Zelda", "Final", "Fantasy", "Halo", "Ring", "Space", "Quest",
+         "Shadow", "Kingdom", "Hearts", "Metal", "Gear", "Solid", "Horizon", "Forbidden", "West", "Star"]
+STATUSES = ["Not Started", "In Progress", "Completed", "Platinum"]
+
+CASES = [
+    ("default order", {}),
+    ("name substring", {"name": "zeld"}),
+    ("name prefix", {"name_prefix": "dark"}),
+    ("text search", {"q": "kingdom hearts"}),
+    ("status filter", {"completion_status": "Completed"}),
+    ("platinum + newest", {"platinum_status": "true", "sort": "-created_at"}),
+    ("rating range by rating", {"min_rating": 7, "max_rating": 9, "sort": "-rating"}),
+    ("status + rating range", {"completion_status": "Completed", "min_rating": 8, "sort": "-rating"}),
+    ("most trophies", {"sort": "-trophies_earned"}),
+]
+
+
+async def seed(count: int, batch: int = 10000):
+    rng = random.Random(42)
+    await server.db.games.drop()
+    await server.startup_db()
+    for start in range(0, count, batch):
+        docs = []
+        for _ in range(start, min(start + batch, count)):
+            total = rng.randint(10, 80)
+            docs.append(server.game_document(server.Game(
+                name=" ".join(rng.sample(WORDS, 3)),
+                completion_status=rng.choice(STATUSES),
+                rating=rng.randint(1, 10),
+                platinum_status=rng.random() < 0.1,
+                trophies_earned=rng.randint(0, total),
+                trophies_total=total,
+                notes=" ".join(rng.choices(WORDS, k=12)),
+            )))
+        await server.db.games.insert_many(docs)
+
+
+async def winning_stage(params: dict) -> str:
+    query = server.game_search_query(
+        params.get("q"), params.get("name"), params.get("name_prefix"), params.get("completion_status"),
+        {"true": True, "false": False}.get(params.get("platinum_status")),
+        params.get("min_rating"), params.get("max_rating"),
+    )
+    sort = server.page_sort(params.get("sort", "created_at"))
+    plan = await server.db.games.find(query).sort(sort).limit(100).explain()
+    stage = plan["queryPlanner"]["winningPlan"]
+    stages = []
+    while stage:
+        stages.append(stage["stage"])
+        stage = stage.get("inputStage") or (stage.get("inputStages") or [None])[0]
+    return ">".join(stages)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the previously seeded dataset")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        print(f"Seeding {args.docs} games into {os.environ['DB_NAME']} ...")
+        await seed(args.docs)
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'case':<26} {'p50 ms':>8} {'p95 ms':>8} {'rows':>5}  plan")
+        for label, params in CASES:
+            samples = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                response = await client.get("/api/games", params=params)
+                samples.append((time.perf_counter() - started) * 1000)
+            samples.sort()
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            plan = await winning_stage(params)
+            print(f"{label:<26} {statistics.median(samples):>8.2f} {p95:>8.2f} {len(response.json()):>5}  {plan}")
+    server.client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark: validated response_model path vs trusted orjson reads.
+
+Runs fully in-process on synthetic documents shaped like what Motor returns,
+so no database is needed. The "validated" column reproduces what a read
+route does with TRUSTED_READS off: build the model per document, then let
+FastAPI validate and serialize against response_model. The "trusted" column
+is the orjson path used with TRUSTED_READS on.
+
+    python benchmarks/bench_serialization.py --games 1000 --series-games 500
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "emergent_bench")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import APIRoute, serialize_response  # noqa: E402
+
+import server  # noqa: E402
+
+
+def game_doc(i: int) -> dict:
+    return {
+        "id": f"00000000-0000-4000-8000-{i:012d}",
+        "name": f"Game {i}",
+        "image_url": f"https://images.example.com/cover/{i}.jpg",
+        "time_played": f"{i % 200} hours",
+        "completion_status": "Completed" if i % 3 else "In Progress",
+        "rating": (i % 10) + 1,
+        "problems": "Occasional frame drops in the late game." * 2,
+        "notes": "Long-form notes about the playthrough. " * 10,
+        "platinum_status": bool(i % 2),
+        "trophies_earned": i % 50,
+        "trophies_total": 50,
+        "created_at": datetime(2024, 1, 1, 12, 0, 0, (i % 1000) * 1000),
+    }
+
+
+def route_field(path: str):
+    for route in server.app.routes:
+        if isinstance(route, APIRoute) and route.path == path and "GET" in route.methods:
+            return route.response_field
+    raise LookupError(path)
+
+
+async def validated(docs, model, field, many: bool) -> bytes:
+    content = [model(**server.sanitize_doc(d)) for d in docs] if many else model(**server.sanitize_doc(docs))
+    value = await serialize_response(field=field, response_content=content)
+    return JSONResponse(value).body
+
+
+async def trusted(docs) -> bytes:
+    return server.trusted_response(docs).body
+
+
+async def measure(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--series-games", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    games = [game_doc(i) for i in range(args.games)]
+    series = {
+        "id": "series-1",
+        "series_name": "Benchmark Series",
+        "games": [game_doc(i) for i in range(args.series_games)],
+        "created_at": datetime(2024, 1, 1),
+    }
+    cases = [
+        (f"GET /api/games ({args.games} games)", games, server.Game, route_field("/api/games"), True),
+        (f"GET /api/game-series/{{id}} ({args.series_games} games)", series, server.GameSeries,
+         route_field("/api/game-series/{series_id}"), False),
+    ]
+
+    print(f"{'case':<45} {'validated ms':>13} {'trusted ms':>11} {'speedup':>8}")
+    for label, docs, model, field, many in cases:
+        slow = await measure(lambda: validated(docs, model, field, many), args.repeat)
+        fast = await measure(lambda: trusted(docs), args.repeat)
+        print(f"{label:<45} {slow:>13.2f} {fast:>11.2f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
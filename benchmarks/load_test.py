@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Async load test for the backend API.
+
+Drives the ASGI app in-process (httpx AsyncClient over ASGITransport, no
+network or server process) with concurrent workers running a weighted mix
+of CRUD requests. Reports p50/p95/p99 latency and throughput per endpoint
+and writes the results as JSON so runs can be compared between commits.
+
+The storage engine defaults to the in-memory engine so the suite runs on a
+laptop with no MongoDB; use --engine mongo (with MONGO_URL) to measure the
+real database, or --engine sqlite.
+
+    python benchmarks/load_test.py --duration 20 --concurrency 64
+    python benchmarks/load_test.py --compare benchmarks/results/<earlier run>.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+# (weight, name) of each request kind in the mixed workload
+WORKLOAD = [
+    (30, "list_games"),
+    (25, "get_game"),
+    (10, "create_game"),
+    (10, "update_game"),
+    (3, "delete_game"),
+    (8, "list_game_series"),
+    (6, "get_game_series"),
+    (5, "add_game_to_series"),
+    (3, "patch_series_game"),
+]
+
+
+def percentile(sorted_samples, pct: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, round(pct / 100 * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def game_payload(rng: random.Random) -> dict:
+    return {
+        "name": f"Load Test Game {rng.randrange(1_000_000)}",
+        "time_played": f"{rng.randint(0, 300)} hours",
+        "completion_status": rng.choice(["Not Started", "In Progress", "Completed"]),
+        "rating": rng.randint(1, 10),
+        "notes": "Generated by the load test. " * rng.randint(0, 8),
+        "trophies_earned": rng.randint(0, 40),
+        "trophies_total": 40,
+    }
+
+
+class LoadTest:
+    def __init__(self, client, rng: random.Random):
+        self.client = client
+        self.rng = rng
+        self.game_ids = []
+        self.series = {}  # series id -> embedded game ids
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def request(self, name: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.samples[name].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+            return None
+        return response.json()
+
+    async def seed(self, games: int, series: int, games_per_series: int):
+        for _ in range(games):
+            game = await self.client.post("/api/games", json=game_payload(self.rng))
+            self.game_ids.append(game.json()["id"])
+        for i in range(series):
+            payload = {"series_name": f"Series {i}", "games": [game_payload(self.rng) for _ in range(games_per_series)]}
+            created = (await self.client.post("/api/game-series", json=payload)).json()
+            self.series[created["id"]] = [g["id"] for g in created["games"]]
+
+    async def run_one(self, kind: str):
+        rng = self.rng
+        if kind == "list_games":
+            await self.request(kind, "GET", "/api/games", params={"limit": 50, "skip": rng.randint(0, 200)})
+        elif kind == "get_game" and self.game_ids:
+            await self.request(kind, "GET", f"/api/games/{rng.choice(self.game_ids)}")
+        elif kind == "create_game":
+            game = await self.request(kind, "POST", "/api/games", json=game_payload(rng))
+            if game:
+                self.game_ids.append(game["id"])
+        elif kind == "update_game" and self.game_ids:
+            await self.request(kind, "PUT", f"/api/games/{rng.choice(self.game_ids)}", json={"rating": rng.randint(1, 10)})
+        elif kind == "delete_game" and len(self.game_ids) > 10:
+            game_id = self.game_ids.pop(rng.randrange(len(self.game_ids)))
+            await self.request(kind, "DELETE", f"/api/games/{game_id}")
+        elif kind == "list_game_series":
+            await self.request(kind, "GET", "/api/game-series", params={"limit": 20})
+        elif kind == "get_game_series" and self.series:
+            await self.request(kind, "GET", f"/api/game-series/{rng.choice(list(self.series))}")
+        elif kind == "add_game_to_series" and self.series:
+            series_id = rng.choice(list(self.series))
+            added = await self.request(kind, "POST", f"/api/game-series/{series_id}/games", json=game_payload(rng))
+            if added:
+                # The updated series, or with WRITE_BEHIND the queued game (202)
+                self.series[series_id].append(added["games"][-1]["id"] if "games" in added else added["id"])
+        elif kind == "patch_series_game" and self.series:
+            series_id = rng.choice(list(self.series))
+            if self.series[series_id]:
+                game_id = rng.choice(self.series[series_id])
+                await self.request(kind, "PATCH", f"/api/game-series/{series_id}/games/{game_id}",
+                                   json={"trophies_earned": rng.randint(0, 40)})
+
+    async def worker(self, deadline: float):
+        weights = [weight for weight, _ in WORKLOAD]
+        kinds = [kind for _, kind in WORKLOAD]
+        while time.perf_counter() < deadline:
+            await self.run_one(self.rng.choices(kinds, weights)[0])
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for name in sorted(self.samples):
+            samples = sorted(self.samples[name])
+            endpoints[name] = {
+                "requests": len(samples),
+                "errors": self.errors[name],
+                "rps": len(samples) / elapsed,
+                "p50_ms": percentile(samples, 50),
+                "p95_ms": percentile(samples, 95),
+                "p99_ms": percentile(samples, 99),
+                "max_ms": samples[-1],
+            }
+        total = sum(len(s) for s in self.samples.values())
+        return {"total_requests": total, "total_rps": total / elapsed, "endpoints": endpoints}
+
+
+def print_report(result: dict, baseline: dict = None):
+    header = f"{'endpoint':<20} {'reqs':>7} {'err':>5} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    if baseline:
+        header += f" {'Δp95':>8} {'Δreq/s':>8}"
+    print(header)
+    for name, stats in result["endpoints"].items():
+        line = (f"{name:<20} {stats['requests']:>7} {stats['errors']:>5} {stats['rps']:>9.1f} "
+                f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+        before = (baseline or {}).get("endpoints", {}).get(name)
+        if before:
+            line += (f" {(stats['p95_ms'] / before['p95_ms'] - 1) * 100 if before['p95_ms'] else 0:>+7.1f}%"
+                     f" {(stats['rps'] / before['rps'] - 1) * 100 if before['rps'] else 0:>+7.1f}%")
+        print(line)
+    print(f"total: {result['total_requests']} requests, {result['total_rps']:.1f} req/s")
+
+
+async def main(args):
+    import httpx
+    import server
+
+    # The app logs at INFO; per-request client logging would dominate the run
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    await server.startup_db()
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as client:
+        test = LoadTest(client, random.Random(args.seed))
+        await test.seed(args.seed_games, args.seed_series, args.games_per_series)
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(test.worker(deadline) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    result = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "config": {
+            "engine": server.STORAGE_ENGINE,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "seed_games": args.seed_games,
+            "seed_series": args.seed_series,
+            "games_per_series": args.games_per_series,
+            "trusted_reads": server.TRUSTED_READS,
+            "read_cache": server.read_cache.enabled,
+        },
+        **test.report(elapsed),
+    }
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_report(result, baseline)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{result['timestamp'][:19].replace(':', '')}-{result['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+    print(f"results written to {output}")
+    server.client.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engine", choices=["memory", "sqlite", "mongo"], default="memory")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of mixed load")
+    parser.add_argument("--seed-games", type=int, default=1000)
+    parser.add_argument("--seed-series", type=int, default=50)
+    parser.add_argument("--games-per-series", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1234, help="random seed for the workload")
+    parser.add_argument("--output", help="results JSON path (default benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to diff against")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    os.environ["STORAGE_ENGINE"] = args.engine
+    if args.engine == "mongo":
+        os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+        os.environ["DB_NAME"] = os.getenv("BENCH_DB_NAME", "emergent_loadtest")
+    elif args.engine == "sqlite":
+        os.environ.setdefault("SQLITE_PATH", os.path.join(tempfile.mkdtemp(), "loadtest.sqlite3"))
+    sys.path.insert(0, str(ROOT / "backend"))
+    asyncio.run(main(args))
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Backfill `minutes_played` on games stored before the field existed.
+
+Walks the games collection in id order, one batch at a time, and writes the
+parsed value with one unordered bulk_write per batch; game series get the
+field set on every embedded game. Uses the same configuration as the server
+(backend/.env, MONGO_URL, DB_NAME, STORAGE_ENGINE). Safe to re-run: only
+documents still missing the field are touched, unless --all is given (e.g.
+after a change to the parser).
+
+    python migrations/backfill_minutes_played.py --batch-size 1000
+    python migrations/backfill_minutes_played.py --all --dry-run
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from pymongo import UpdateOne
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import server  # noqa: E402
+from playtime import parse_minutes  # noqa: E402
+
+
+async def batches(collection, query: dict, projection: dict, size: int):
+    """Yield lists of documents matching `query`, paging by id so updates cannot skew the scan."""
+    last_id = None
+    while True:
+        page_query = {**query, "id": {"$gt": last_id}} if last_id is not None else query
+        docs = await collection.find(page_query, projection).sort("id", 1).limit(size).to_list(length=size)
+        if not docs:
+            return
+        yield docs
+        last_id = docs[-1]["id"]
+
+
+async def backfill_games(collection, size: int, everything: bool, dry_run: bool) -> int:
+    query = {} if everything else {"minutes_played": {"$exists": False}}
+    updated = 0
+    async for docs in batches(collection, query, {"_id": 0, "id": 1, "time_played": 1}, size):
+        requests = [
+            UpdateOne({"id": doc["id"]}, {"$set": {"minutes_played": parse_minutes(doc.get("time_played"))}})
+            for doc in docs
+        ]
+        if not dry_run:
+            await collection.bulk_write(requests, ordered=False)
+        updated += len(requests)
+    return updated
+
+
+async def backfill_series(collection, size: int, everything: bool, dry_run: bool) -> int:
+    query = {} if everything else {"games": {"$elemMatch": {"minutes_played": {"$exists": False}}}}
+    projection = {"_id": 0, "id": 1, "games.id": 1, "games.time_played": 1}
+    updated = 0
+    async for docs in batches(collection, query, projection, size):
+        requests = []
+        for doc in docs:
+            games = doc.get("games", [])
+            if not games:
+                continue
+            # Address games by position, guarded by their ids in case the array changed meanwhile
+            guard = {"id": doc["id"], **{f"games.{i}.id": g.get("id") for i, g in enumerate(games)}}
+            values = {f"games.{i}.minutes_played": parse_minutes(g.get("time_played")) for i, g in enumerate(games)}
+            requests.append(UpdateOne(guard, {"$set": values}))
+        if requests and not dry_run:
+            await collection.bulk_write(requests, ordered=False)
+        updated += len(requests)
+    return updated
+
+
+async def main(args):
+    games = await backfill_games(server.db.games, args.batch_size, args.all, args.dry_run)
+    series = await backfill_series(server.db.game_series, args.batch_size, args.all, args.dry_run)
+    if not args.dry_run:
+        await server.record_write(server.db.games)
+        await server.record_write(server.db.game_series)
+        await server.db.games.create_index([("minutes_played", 1), ("id", 1)])
+    verb = "would update" if args.dry_run else "updated"
+    print(f"{verb} {games} games and {series} game series")
+    await server.revisions.stop()
+    server.client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--all", action="store_true", help="recompute every document, not only missing ones")
+    parser.add_argument("--dry-run", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Backfill `name_lower` on games stored before the field existed.
+
+GET /api/games?name=... and ?name_prefix=... match against the lowercased
+copy of the name, so games without it are not found by name search until
+this has run. Walks the games collection in id order, one batch at a time,
+with one unordered bulk_write per batch, and creates the (name_lower, id)
+index. Uses the same configuration as the server (backend/.env, MONGO_URL,
+DB_NAME, STORAGE_ENGINE). Safe to re-run: only games still missing the field
+are touched, unless --all is given.
+
+    python migrations/backfill_name_lower.py --batch-size 1000
+    python migrations/backfill_name_lower.py --all --dry-run
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from pymongo import UpdateOne
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import server  # noqa: E402
+
+
+async def backfill_games(collection, size: int, everything: bool, dry_run: bool) -> int:
+    query = {} if everything else {"name_lower": {"$exists": False}}
+    updated, last_id = 0, None
+    while True:
+        page_query = {**query, "id": {"$gt": last_id}} if last_id is not None else query
+        docs = await collection.find(page_query, {"_id": 0, "id": 1, "name": 1}).sort("id", 1).limit(size).to_list(size)
+        if not docs:
+            return updated
+        last_id = docs[-1]["id"]
+        # Guarded by the name read, so a rename meanwhile keeps the value its own write set
+        requests = [
+            UpdateOne({"id": doc["id"], "name": doc.get("name")},
+                      {"$set": {"name_lower": (doc.get("name") or "").lower()}})
+            for doc in docs
+        ]
+        if not dry_run:
+            await collection.bulk_write(requests, ordered=False)
+        updated += len(requests)
+
+
+async def main(args):
+    games = await backfill_games(server.db.games, args.batch_size, args.all, args.dry_run)
+    if not args.dry_run:
+        await server.record_write(server.db.games)
+        await server.db.games.create_index([("name_lower", 1), ("id", 1)])
+    print(f"{'would update' if args.dry_run else 'updated'} {games} games")
+    await server.revisions.stop()
+    server.client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--all", action="store_true", help="recompute every game, not only missing ones")
+    parser.add_argument("--dry-run", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Recompute game series aggregates that are missing or wrong.
+
+Game series carry game_count and the rating / trophy sums of their games.
+Series stored before those were maintained have none, and while instances
+running older code still write they can drift: an old instance adds, edits or
+removes games without updating them. Run this after deploying the code that
+maintains them, and again once the last old instance is gone. The server can
+do the same on startup with BACKFILL_SERIES_AGGREGATES, but an instance
+started mid-deploy cannot see what old instances write afterwards, and every
+start then reads every series. Uses the same configuration as the server
+(backend/.env, MONGO_URL, DB_NAME, STORAGE_ENGINE). Safe to re-run:
+consistent series are not touched.
+
+    python migrations/backfill_series_aggregates.py
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import server  # noqa: E402
+
+
+async def main(args):
+    fixed = await server.backfill_series_aggregates(server.db.game_series)
+    print(f"fixed aggregates on {fixed} game series")
+    server.client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Convert stored ids between UUID strings and BSON Binary subtype 4.
+
+Rewrites the top-level `id` of games, game series and movie series and the
+`id` of every game / movie embedded in a series, one batch at a time with an
+unordered bulk_write per batch. Each update is guarded by the values it
+replaces, so a concurrent write is never overwritten (its document keeps the
+old form and is picked up by a re-run). Ids that are not canonical UUID
+strings are left as they are. Uses the same configuration as the server
+(backend/.env, MONGO_URL, DB_NAME); MongoDB only.
+
+Deploy order: run `--to binary`, then set BINARY_IDS=1. Until the server
+runs with BINARY_IDS, documents already converted are not found by id
+(lists still show them), so run it in a quiet period or with writes stopped.
+`--to string` converts back before turning BINARY_IDS off again. Indexes
+shrink on disk once their pages are rewritten; `--compact` runs the compact
+command on each collection afterwards.
+
+    python migrations/convert_ids.py --to binary --batch-size 1000
+    python migrations/convert_ids.py --to string --dry-run
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from bson.codec_options import CodecOptions
+from pymongo import UpdateOne
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import server  # noqa: E402
+from binary_ids import from_binary, to_binary  # noqa: E402
+
+# Collection -> array of embedded documents with their own id
+COLLECTIONS = {"games": None, "game_series": "games", "movie_series": "movies"}
+# BSON type of ids that still need converting, per target form
+SOURCE_TYPE = {"binary": "string", "string": "binData"}
+
+
+def converted(value, target: str):
+    new = to_binary(value) if target == "binary" else from_binary(value)
+    return None if new is value else new
+
+
+def conversion(doc: dict, array: str, target: str) -> UpdateOne:
+    """Update setting every convertible id of `doc`, guarded by the current values."""
+    guard, values = {"_id": doc["_id"]}, {}
+    paths = [("id", doc.get("id"))]
+    if array:
+        paths += [(f"{array}.{i}.id", member.get("id")) for i, member in enumerate(doc.get(array) or [])]
+    for path, value in paths:
+        new = converted(value, target)
+        if new is not None:
+            guard[path] = value
+            values[path] = new
+    return UpdateOne(guard, {"$set": values}) if values else None
+
+
+async def convert(collection, array: str, target: str, size: int, dry_run: bool) -> int:
+    # Read raw values (the client's registry would decode Binary ids into strings)
+    raw = collection.with_options(codec_options=CodecOptions())
+    id_type = {"$type": SOURCE_TYPE[target]}
+    query = {"$or": [{"id": id_type}, {f"{array}.id": id_type}]} if array else {"id": id_type}
+    projection = {"_id": 1, "id": 1, **({f"{array}.id": 1} if array else {})}
+    updated, last = 0, None
+    while True:
+        page_query = {**query, "_id": {"$gt": last}} if last is not None else query
+        docs = await raw.find(page_query, projection).sort("_id", 1).limit(size).to_list(length=size)
+        if not docs:
+            return updated
+        last = docs[-1]["_id"]
+        requests = [r for r in (conversion(doc, array, target) for doc in docs) if r is not None]
+        if requests and not dry_run:
+            await raw.bulk_write(requests, ordered=False)
+        updated += len(requests)
+
+
+async def main(args):
+    if server.STORAGE_ENGINE != "mongo":
+        sys.exit("Binary ids only apply to the mongo storage engine.")
+    database = server.client[server.DB_NAME]
+    for name, array in COLLECTIONS.items():
+        count = await convert(database[name], array, args.to, args.batch_size, args.dry_run)
+        print(f"{name}: {'would convert' if args.dry_run else 'converted'} {count} documents")
+        if not args.dry_run:
+            await server.record_write(server.db[name])
+            if args.compact:
+                await database.command("compact", name)
+    await server.revisions.stop()
+    server.client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--to", choices=("binary", "string"), default="binary")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--compact", action="store_true", help="run compact on each collection afterwards")
+    parser.add_argument("--dry-run", action="store_true")
+    asyncio.run(main(parser.parse_args()))
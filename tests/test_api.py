@@ -0,0 +1,244 @@
+"""
+Behaviour of the API routes, run in-process against the memory storage
+engine, so no MongoDB is needed.
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "emergent_test")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import server  # noqa: E402
+from storage import open_database  # noqa: E402
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """Run `scenario(client)` against the app on a fresh in-memory database."""
+    monkeypatch.setattr(server, "db", open_database("memory", db_name="test"))
+    monkeypatch.setattr(server, "revisions", server.Revisions(server.REVISION_REFRESH_SECONDS))
+
+    def run(scenario):
+        async def runner():
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await scenario(client)
+        return asyncio.run(runner())
+    return run
+
+
+def test_bulk_reports_every_operation(api):
+    async def scenario(client):
+        game = (await client.post("/api/games", json={"name": "Halo", "rating": 8})).json()
+        response = await client.post("/api/games/bulk", json=[
+            {"op": "create", "data": {"name": "Celeste", "rating": 9}},
+            {"op": "update", "id": game["id"], "data": {"rating": 10}},
+            {"op": "delete", "id": "missing"},
+        ])
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [(r["index"], r["op"], r["status"]) for r in results] == [
+            (0, "create", "created"), (1, "update", "updated"), (2, "delete", "not_found"),
+        ]
+        assert (await client.get(f"/api/games/{game['id']}")).json()["rating"] == 10
+        assert (await client.get(f"/api/games/{results[0]['id']}")).json()["name"] == "Celeste"
+    api(scenario)
+
+
+def test_read_cache_is_invalidated_by_writes(api, monkeypatch):
+    monkeypatch.setattr(server, "read_cache", server.ReadCache(True, 16, 60))
+
+    async def scenario(client):
+        game = (await client.post("/api/games", json={"name": "Halo", "rating": 8})).json()
+        for _ in range(2):
+            assert (await client.get(f"/api/games/{game['id']}")).json()["rating"] == 8
+        stats = (await client.get("/api/cache/stats")).json()
+        assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+        await client.put(f"/api/games/{game['id']}", json={"rating": 3})
+        assert (await client.get(f"/api/games/{game['id']}")).json()["rating"] == 3
+        await client.delete(f"/api/games/{game['id']}")
+        assert (await client.get(f"/api/games/{game['id']}")).status_code == 404
+    api(scenario)
+
+
+def test_etags_change_with_writes(api, monkeypatch):
+    monkeypatch.setattr(server, "revisions", server.Revisions(60))
+
+    async def scenario(client):
+        game = (await client.post("/api/games", json={"name": "Halo", "rating": 8})).json()
+        url = f"/api/games/{game['id']}"
+        etag = (await client.get(url)).headers["etag"]
+        assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 304
+        await client.put(url, json={"rating": 3})
+        await server.revisions.stop()
+        response = await client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200 and response.headers["etag"] != etag
+        etag = response.headers["etag"]
+        # Another instance's write is picked up once the in-process revision is refreshed
+        await server.db.revisions.update_one({"_id": "games"}, {"$inc": {"rev": 1}})
+        assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 304
+        server.revisions.refresh = 0
+        assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 200
+        assert (await client.get("/api/games/missing", headers={"If-None-Match": "*"})).status_code == 404
+    api(scenario)
+
+
+def test_writes_do_not_wait_for_the_shared_revision(api, monkeypatch):
+    monkeypatch.setattr(server, "revisions", server.Revisions(60))
+
+    async def scenario(client):
+        game = (await client.post("/api/games", json={"name": "Halo", "rating": 8})).json()
+        url = f"/api/games/{game['id']}"
+        etag = (await client.get(url)).headers["etag"]
+        await server.revisions.stop()
+
+        revisions = server.db[server.REVISIONS_COLLECTION]
+        find_one_and_update = revisions.find_one_and_update
+        release = asyncio.Event()
+
+        async def held_find_one_and_update(*args, **kwargs):
+            await release.wait()
+            return await find_one_and_update(*args, **kwargs)
+        monkeypatch.setattr(revisions, "find_one_and_update", held_find_one_and_update)
+        assert (await client.put(url, json={"rating": 3})).status_code == 200
+        # The in-process revision moved at once, so the old ETag no longer matches
+        response = await client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200 and response.json()["rating"] == 3
+        etag = response.headers["etag"]
+
+        release.set()
+        await server.revisions.stop()
+        assert (await revisions.find_one({"_id": "games"}))["rev"] == (await server.revisions.get(server.db.games))[0]
+        assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 304
+    api(scenario)
+
+
+def test_name_search_is_case_insensitive(api):
+    async def scenario(client):
+        for name in ("Dark Souls", "dark forest", "Halo"):
+            await client.post("/api/games", json={"name": name, "rating": 5})
+        game = (await client.get("/api/games", params={"name_prefix": "HALO"})).json()[0]
+        await client.put(f"/api/games/{game['id']}", json={"name": "DARKEST Dungeon"})
+
+        async def names(**params):
+            return sorted(g["name"] for g in (await client.get("/api/games", params=params)).json())
+        assert await names(name_prefix="DaRk") == ["DARKEST Dungeon", "Dark Souls", "dark forest"]
+        assert await names(name="SOUL") == ["Dark Souls"]
+
+        # name_lower is a stored search key, never part of a response
+        created = (await client.post("/api/games", json={"name": "Celeste", "rating": 9})).json()
+        updated = (await client.put(f"/api/games/{created['id']}", json={"name": "CELESTE"})).json()
+        bulk = (await client.post("/api/games/bulk", json=[{"op": "create", "data": {"name": "Hades"}}])).json()
+        responses = [created, updated, (await client.get(f"/api/games/{created['id']}")).json()]
+        responses += (await client.get("/api/games")).json()
+        assert bulk["results"][0]["status"] == "created"
+        assert all("name_lower" not in game for game in responses)
+        assert (await client.get("/api/games", params={"fields": "name_lower"})).status_code == 400
+        schema = (await client.get("/openapi.json")).json()["components"]["schemas"]["Game"]
+        assert "name_lower" not in schema["properties"]
+    api(scenario)
+
+
+def test_series_members_are_paged_and_updated_in_place(api):
+    async def scenario(client):
+        games = [{"name": f"Game {i}", "rating": 5} for i in range(5)]
+        series = (await client.post("/api/game-series", json={"series_name": "S", "games": games})).json()
+        url = f"/api/game-series/{series['id']}/games"
+        page = (await client.get(url, params={"skip": 1, "limit": 2})).json()
+        assert [g["name"] for g in page] == ["Game 1", "Game 2"]
+        member = page[0]
+        response = await client.patch(f"{url}/{member['id']}", json={"notes": "boss", "rating": 9})
+        assert response.json() == {**member, "notes": "boss", "rating": 9}
+        assert (await client.patch(f"{url}/missing", json={"notes": "x"})).status_code == 404
+        assert (await client.delete(f"{url}/{page[1]['id']}")).status_code == 200
+        names = [g["name"] for g in (await client.get(url)).json()]
+        assert names == ["Game 0", "Game 1", "Game 3", "Game 4"]
+        assert (await client.get("/api/game-series/missing/games")).status_code == 404
+    api(scenario)
+
+
+def test_fields_projects_lists_and_single_reads(api):
+    async def scenario(client):
+        game = (await client.post("/api/games", json={"name": "Halo", "rating": 8, "notes": "x"})).json()
+        listed = (await client.get("/api/games", params={"fields": "name,rating"})).json()
+        assert listed == [{"id": game["id"], "name": "Halo", "rating": 8}]
+        single = (await client.get(f"/api/games/{game['id']}", params={"fields": "notes"})).json()
+        assert single == {"id": game["id"], "notes": "x"}
+        assert (await client.get("/api/games", params={"fields": "name,secret"})).status_code == 400
+    api(scenario)
+
+
+def test_series_aggregates_follow_member_writes(api, monkeypatch):
+    async def scenario(client):
+        games = [{"name": "A", "rating": 4, "trophies_earned": 2}, {"name": "B", "rating": 6}]
+        series = (await client.post("/api/game-series", json={"series_name": "S", "games": games})).json()
+        url = f"/api/game-series/{series['id']}"
+        added = (await client.post(f"{url}/games", json={"name": "C", "rating": 8, "trophies_total": 5})).json()
+        await client.patch(f"{url}/games/{added['games'][0]['id']}", json={"rating": 10})
+        await client.delete(f"{url}/games/{added['games'][1]['id']}")
+        summary = (await client.get("/api/game-series", params={"summary": "true"})).json()[0]
+        assert (summary["game_count"], summary["rating_sum"], summary["average_rating"]) == (2, 18, 9.0)
+        assert (summary["trophies_earned_sum"], summary["trophies_total_sum"]) == (2, 5)
+
+        # A writer that changes the member's rating before every guarded update forces a 409
+        collection = server.db.game_series
+        find_one_and_update = collection.find_one_and_update
+        racing = True
+
+        async def racing_find_one_and_update(filter, update, *args, **kwargs):
+            if racing and "$elemMatch" in str(filter):
+                await collection.update_one({"id": series["id"], "games.id": added["games"][0]["id"]},
+                                            {"$inc": {"games.$.rating": -1, "rating_sum": -1}})
+            return await find_one_and_update(filter, update, *args, **kwargs)
+        monkeypatch.setattr(collection, "find_one_and_update", racing_find_one_and_update)
+        response = await client.patch(f"{url}/games/{added['games'][0]['id']}", json={"rating": 1})
+        assert response.status_code == 409
+        racing = False
+
+        # The backfill repairs missing and drifted aggregates
+        legacy_games = [{"id": "g", "name": "G", "rating": 3}]
+        await collection.insert_one({"id": "legacy", "series_name": "L", "games": legacy_games})
+        await collection.update_one({"id": series["id"]}, {"$inc": {"game_count": 5}})
+        assert await server.backfill_series_aggregates(collection) == 2
+        legacy = (await client.get("/api/game-series/legacy")).json()
+        assert (legacy["game_count"], legacy["rating_sum"]) == (1, 3)
+        assert (await client.get(url)).json()["game_count"] == 2
+        assert await server.backfill_series_aggregates(collection) == 0
+    api(scenario)
+
+
+def test_series_put_recomputes_minutes_played(api):
+    async def scenario(client):
+        games = [{"name": "A", "rating": 5, "time_played": "10 hours"}]
+        series = (await client.post("/api/game-series", json={"series_name": "S", "games": games})).json()
+        assert series["games"][0]["minutes_played"] == 600
+        # The UI sends the stored games back with only the edited fields changed
+        edited = [{**series["games"][0], "time_played": "50 hours"}]
+        updated = (await client.put(f"/api/game-series/{series['id']}", json={"games": edited})).json()
+        assert updated["games"][0]["minutes_played"] == 3000
+        stored = (await client.get(f"/api/game-series/{series['id']}/games")).json()
+        assert stored[0]["minutes_played"] == 3000
+    api(scenario)
+
+
+def test_batch_get_keeps_request_order(api, monkeypatch):
+    async def scenario(client):
+        ids = [(await client.post("/api/games", json={"name": name, "rating": 5})).json()["id"] for name in "ABC"]
+        body = {"ids": [ids[2], "missing", ids[0], ids[2]]}
+        results = (await client.post("/api/games/batch-get", json=body, params={"fields": "name"})).json()["results"]
+        assert [(r["id"], r["status"], r["data"]) for r in results] == [
+            (ids[2], "found", {"id": ids[2], "name": "C"}),
+            ("missing", "not_found", None),
+            (ids[0], "found", {"id": ids[0], "name": "A"}),
+            (ids[2], "found", {"id": ids[2], "name": "C"}),
+        ]
+        monkeypatch.setattr(server, "BATCH_GET_MAX_IDS", 2)
+        assert (await client.post("/api/games/batch-get", json=body)).status_code == 413
+    api(scenario)
@@ -0,0 +1,41 @@
+import sys
+import uuid
+from pathlib import Path
+
+import bson
+from bson.binary import Binary, UUID_SUBTYPE
+from bson.codec_options import CodecOptions
+from pymongo import UpdateOne
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from binary_ids import ID_TYPE_REGISTRY, _encode_request, encode_ids  # noqa: E402
+
+
+def test_ids_round_trip_through_bson():
+    series_id, game_id = str(uuid.uuid4()), str(uuid.uuid4())
+    doc = {"id": series_id, "series_name": "S", "games": [{"id": game_id, "name": "G"}, {"id": "not-a-uuid"}]}
+    encoded = encode_ids(doc)
+    assert encoded["id"] == Binary(uuid.UUID(series_id).bytes, UUID_SUBTYPE)
+    assert encoded["games"][1]["id"] == "not-a-uuid"
+    assert encoded["series_name"] == "S"
+    decoded = bson.decode(bson.encode(encoded), codec_options=CodecOptions(type_registry=ID_TYPE_REGISTRY))
+    assert decoded == doc
+
+
+def test_filters_and_bulk_requests_are_encoded():
+    a, b = sorted(str(uuid.uuid4()) for _ in range(2))
+    query = encode_ids({"$or": [{"id": {"$in": [a, b]}}, {"games.id": a, "name": a}], "id": {"$exists": True}})
+    assert query["$or"][0]["id"]["$in"] == [to_bytes(a), to_bytes(b)]
+    assert query["$or"][1] == {"games.id": to_bytes(a), "name": a}
+    assert query["id"] == {"$exists": True}
+    # Binary UUIDs sort like their strings, so keyset paging by id keeps its order
+    assert to_bytes(a) < to_bytes(b)
+    request = _encode_request(UpdateOne({"id": a}, {"$push": {"games": {"id": b}}}, upsert=True))
+    assert request._filter == {"id": to_bytes(a)}
+    assert request._doc == {"$push": {"games": {"id": to_bytes(b)}}}
+    assert request._upsert
+
+
+def to_bytes(value: str) -> Binary:
+    return Binary(uuid.UUID(value).bytes, UUID_SUBTYPE)
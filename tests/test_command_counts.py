@@ -0,0 +1,134 @@
+"""
+Counts the MongoDB commands each mutating route issues.
+
+Runs the ASGI app in-process against a real mongod (MONGO_URL, default
+mongodb://localhost:27017) and is skipped when none is reachable. A write
+also bumps the collection revision, in the background: the response does
+not wait for it (see test_api.py), but it is still counted here.
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+from pymongo import MongoClient, monitoring
+from pymongo.errors import PyMongoError
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ["DB_NAME"] = os.getenv("TEST_DB_NAME", "emergent_test")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+
+import server  # noqa: E402
+
+DATA_COMMANDS = {"find", "insert", "update", "delete", "findAndModify", "aggregate"}
+
+
+def _mongo_available() -> bool:
+    try:
+        MongoClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=500).admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not _mongo_available(), reason="MongoDB not reachable")
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.commands = []
+
+    def started(self, event):
+        if event.command_name in DATA_COMMANDS:
+            self.commands.append((event.command_name, event.command.get(event.command_name)))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def run_counted(scenario):
+    """Run `scenario(client, counter)` against the app with a listening Motor client."""
+    async def runner():
+        counter = CommandCounter()
+        motor_client = AsyncIOMotorClient(os.environ["MONGO_URL"], event_listeners=[counter])
+        server.db = motor_client[os.environ["DB_NAME"]]
+        transport = httpx.ASGITransport(app=server.app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await scenario(client, counter)
+        finally:
+            await server.revisions.stop()
+            await motor_client.drop_database(os.environ["DB_NAME"])
+            motor_client.close()
+    return asyncio.run(runner())
+
+
+REVISION_BUMP = ("findAndModify", server.REVISIONS_COLLECTION)
+
+
+async def settled(counter):
+    """The commands counted so far, once background revision bumps have run."""
+    await server.revisions.stop()
+    return counter.commands
+
+
+def test_update_game_is_one_round_trip():
+    async def scenario(client, counter):
+        game = (await client.post("/api/games", json={"name": "Celeste", "rating": 9})).json()
+        (await settled(counter)).clear()
+        response = await client.put(f"/api/games/{game['id']}", json={"rating": 10})
+        assert response.status_code == 200
+        assert response.json()["rating"] == 10
+        assert await settled(counter) == [("findAndModify", "games"), REVISION_BUMP]
+    run_counted(scenario)
+
+
+def test_update_missing_game_is_one_round_trip():
+    async def scenario(client, counter):
+        response = await client.put("/api/games/does-not-exist", json={"rating": 10})
+        assert response.status_code == 404
+        assert await settled(counter) == [("findAndModify", "games")]
+    run_counted(scenario)
+
+
+@pytest.mark.parametrize("path, payload, collection", [
+    ("/api/game-series", {"series_name": "Halo"}, "game_series"),
+    ("/api/movie-series", {"series_name": "Alien"}, "movie_series"),
+])
+def test_update_series_is_one_round_trip(path, payload, collection):
+    async def scenario(client, counter):
+        series = (await client.post(path, json=payload)).json()
+        (await settled(counter)).clear()
+        response = await client.put(f"{path}/{series['id']}", json={"series_name": "Renamed"})
+        assert response.status_code == 200
+        assert response.json()["series_name"] == "Renamed"
+        assert await settled(counter) == [("findAndModify", collection), REVISION_BUMP]
+    run_counted(scenario)
+
+
+@pytest.mark.parametrize("path, payload, member, field, collection", [
+    ("/api/game-series", {"series_name": "Halo"}, {"name": "Halo 3", "rating": 9}, "games", "game_series"),
+    ("/api/movie-series", {"series_name": "Alien"}, {"title": "Aliens"}, "movies", "movie_series"),
+])
+def test_append_to_series_is_one_round_trip(path, payload, member, field, collection):
+    async def scenario(client, counter):
+        series = (await client.post(path, json=payload)).json()
+        (await settled(counter)).clear()
+        response = await client.post(f"{path}/{series['id']}/{field}", json=member)
+        assert response.status_code == 200
+        assert len(response.json()[field]) == 1
+        assert await settled(counter) == [("findAndModify", collection), REVISION_BUMP]
+
+        counter.commands.clear()
+        response = await client.post(f"{path}/missing/{field}", json=member)
+        assert response.status_code == 404
+        assert await settled(counter) == [("findAndModify", collection)]
+    run_counted(scenario)
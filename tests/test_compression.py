@@ -0,0 +1,56 @@
+import asyncio
+import gzip
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from compression import CompressedCache, CompressionMiddleware, negotiate  # noqa: E402
+
+
+def test_negotiate_honours_q_values_and_server_order():
+    assert negotiate("gzip, br", ("zstd", "br", "gzip")) == "br"
+    assert negotiate("gzip;q=1, br;q=0.5", ("zstd", "br", "gzip")) == "gzip"
+    assert negotiate("*;q=0.1, gzip;q=0", ("gzip",)) is None
+    assert negotiate("identity", ("gzip",)) is None
+    assert negotiate(None, ("gzip",)) is None
+
+
+def test_middleware_compresses_large_bodies_once():
+    def app_for(body: bytes, content_type: bytes):
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": [
+                (b"content-type", content_type), (b"content-length", str(len(body)).encode()),
+                (b"etag", b'"v1"'),
+            ]})
+            await send({"type": "http.response.body", "body": body})
+        return app
+
+    async def get(app):
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", b"gzip")]}
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+        await app(scope, None, send)
+        return dict(sent[0]["headers"]), sent[1]["body"]
+
+    async def go():
+        cache = CompressedCache(1 << 20)
+        payload = b'{"notes": "' + b"x" * 5000 + b'"}'
+        app = CompressionMiddleware(app_for(payload, b"application/json"), 1024, {"gzip": 6}, cache)
+        for _ in range(2):
+            headers, body = await get(app)
+            assert headers[b"content-encoding"] == b"gzip"
+            assert headers[b"etag"] == b'W/"v1"'
+            assert int(headers[b"content-length"]) == len(body)
+            assert gzip.decompress(body) == payload
+        assert (cache.hits, cache.misses) == (1, 1)
+        small = CompressionMiddleware(app_for(b"{}", b"application/json"), 1024, {"gzip": 6}, cache)
+        headers, body = await get(small)
+        assert b"content-encoding" not in headers and body == b"{}"
+        assert headers[b"etag"] == b'"v1"'
+        events = CompressionMiddleware(app_for(payload, b"text/event-stream"), 1024, {"gzip": 6}, cache)
+        headers, body = await get(events)
+        assert b"content-encoding" not in headers and body == payload
+    asyncio.run(go())
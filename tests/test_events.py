@@ -0,0 +1,26 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from events import EventHub  # noqa: E402
+
+
+def test_fan_out_filters_and_resyncs_slow_clients():
+    async def go():
+        hub = EventHub(queue_size=3)
+        games_only = hub.subscribe(["games"])
+        everything = hub.subscribe()
+        hub.publish_local("game_series", "insert", ["s1"])
+        for i in range(3):
+            hub.publish_local("games", "update", [f"g{i}"])
+        assert games_only.queue.qsize() == 3
+        # everything got 4 events for 3 slots: its backlog is replaced by a resync marker
+        assert everything.queue.get_nowait() == {"type": "resync"}
+        assert everything.queue.empty()
+        hub.unsubscribe(games_only)
+        hub.source = "change_stream"
+        hub.publish_local("games", "delete", ["g0"])
+        assert everything.queue.empty()
+    asyncio.run(go())
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from idempotency import IdempotencyMiddleware, MemoryIdempotencyStore  # noqa: E402
+from metrics import MetricsMiddleware, http_requests_total  # noqa: E402
+
+
+def test_retries_replay_the_stored_response():
+    calls = []
+
+    async def app(scope, receive, send):
+        body = (await receive())["body"]
+        calls.append(body)
+        status = 500 if body == b"fail" else 201
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b"created %d" % len(calls)})
+
+    async def post(middleware, body: bytes, key: bytes = b"k1"):
+        scope = {"type": "http", "method": "POST", "path": "/api/games", "query_string": b"",
+                 "headers": [(b"idempotency-key", key)]}
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+        await middleware(scope, receive, send)
+        return sent[0]["status"], dict(sent[0]["headers"]), sent[1]["body"]
+
+    async def go():
+        middleware = IdempotencyMiddleware(app, ["/api/games"], MemoryIdempotencyStore(timedelta(hours=1)))
+        assert await post(middleware, b"a") == (201, {b"content-type": b"text/plain"}, b"created 1")
+        status, headers, body = await post(middleware, b"a")
+        assert (status, body, headers[b"idempotent-replayed"]) == (201, b"created 1", b"true")
+        status, _, body = await post(middleware, b"b")
+        assert status == 422 and "different request" in json.loads(body)["detail"]
+        # Server errors release the key, so the retry runs again
+        assert (await post(middleware, b"fail", b"k2"))[0] == 500
+        assert (await post(middleware, b"fail", b"k2"))[0] == 500
+        assert calls == [b"a", b"fail", b"fail"]
+    asyncio.run(go())
+
+
+def test_replays_are_counted_under_their_route():
+    async def app(scope, receive, send):
+        await receive()
+        scope["route"] = type("Route", (), {"path": "/api/replayed"})()
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def post(middleware):
+        scope = {"type": "http", "method": "POST", "path": "/api/replayed", "query_string": b"",
+                 "headers": [(b"idempotency-key", b"k")]}
+
+        async def receive():
+            return {"type": "http.request", "body": b"{}", "more_body": False}
+
+        async def send(message):
+            pass
+        await middleware(scope, receive, send)
+
+    async def go():
+        store = MemoryIdempotencyStore(timedelta(hours=1))
+        middleware = MetricsMiddleware(IdempotencyMiddleware(app, ["/api/replayed"], store))
+        for _ in range(3):
+            await post(middleware)
+        assert http_requests_total.value("POST", "/api/replayed", "201") == 3
+    asyncio.run(go())
@@ -0,0 +1,38 @@
+"""
+/api/stats figures, computed by the Python fallback on the in-memory engine
+(the same facets the aggregation pipeline produces on MongoDB).
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from library_stats import compute_stats  # noqa: E402
+from storage import open_database  # noqa: E402
+
+
+def test_stats_cover_standalone_and_series_games():
+    async def go():
+        db = open_database("memory", db_name="test")
+        await db.games.insert_many([
+            {"id": "a", "rating": 8, "completion_status": "Completed", "platinum_status": True,
+             "trophies_earned": 10, "trophies_total": 10, "minutes_played": 7200},
+            {"id": "b", "rating": 3, "completion_status": "Not Started", "platinum_status": False,
+             "trophies_earned": 2, "trophies_total": 8, "minutes_played": 150},
+        ])
+        await db.game_series.insert_one({"id": "s", "games": [
+            {"id": "c", "rating": 8, "completion_status": "In Progress"},
+        ]})
+        return await compute_stats(db)
+
+    stats = asyncio.run(go())
+    assert stats["games"] == {"total": 3, "standalone": 2, "in_series": 1}
+    assert stats["completion_status"] == {"Completed": 1, "Not Started": 1, "In Progress": 1}
+    assert stats["platinum"] == {"count": 1, "percent": 33.33}
+    assert stats["rating_histogram"]["8"] == 2 and stats["rating_histogram"]["3"] == 1
+    assert stats["trophies"]["completion_percent"] == 66.67
+    assert stats["trophies"]["average_game_completion_percent"] == 62.5
+    assert stats["trophies"]["fully_completed"] == 1
+    assert stats["playtime"] == {"total_minutes": 7350, "total_hours": 122.5}
@@ -0,0 +1,27 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from playtime import parse_minutes  # noqa: E402
+
+
+@pytest.mark.parametrize("text, minutes", [
+    ("120 hours", 7200),
+    ("45h", 2700),
+    ("2.5 hours", 150),
+    ("1h 30m", 90),
+    ("1h 30", 90),
+    ("2:15", 135),
+    ("90 min", 90),
+    ("3 days", 4320),
+    ("40", 2400),
+    ("about 10 hours over 3 sessions", 600),
+    ("", 0),
+    (None, 0),
+    ("n/a", 0),
+])
+def test_parse_minutes(text, minutes):
+    assert parse_minutes(text) == minutes
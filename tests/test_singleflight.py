@@ -0,0 +1,67 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from metrics import MetricsMiddleware, http_requests_total  # noqa: E402
+from singleflight import SingleFlight, SingleFlightMiddleware  # noqa: E402
+
+
+def test_concurrent_identical_gets_share_one_execution():
+    calls = []
+
+    async def app(scope, receive, send):
+        calls.append(scope["path"])
+        await asyncio.sleep(0.01)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": f"call {len(calls)}".encode()})
+
+    async def get(middleware, path, query=b""):
+        scope = {"type": "http", "method": "GET", "path": path, "query_string": query, "headers": []}
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+        await middleware(scope, None, send)
+        return sent[-1]["body"]
+
+    async def go():
+        single_flight = SingleFlight(["/api/games/{game_id}"])
+        middleware = SingleFlightMiddleware(app, single_flight)
+        bodies = await asyncio.gather(
+            get(middleware, "/api/games/1", b"a=1&b=2"),
+            get(middleware, "/api/games/1", b"b=2&a=1"),
+            get(middleware, "/api/games/2"),
+            get(middleware, "/api/other"),
+        )
+        assert bodies[0] == bodies[1]
+        assert len(calls) == 3
+        # Nothing is kept once the flight has landed
+        assert not single_flight.flights
+        assert await get(middleware, "/api/games/1", b"a=1&b=2") == b"call 4"
+    asyncio.run(go())
+
+
+def test_coalesced_requests_are_counted_under_their_route():
+    async def app(scope, receive, send):
+        await asyncio.sleep(0.01)
+        scope["route"] = type("Route", (), {"path": "/api/burst"})()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"[]"})
+
+    async def get(middleware):
+        scope = {"type": "http", "method": "GET", "path": "/api/burst", "query_string": b"", "headers": []}
+
+        async def send(message):
+            pass
+        await middleware(scope, None, send)
+
+    async def go():
+        middleware = MetricsMiddleware(SingleFlightMiddleware(app, SingleFlight(["/api/burst"])))
+        # The counters are process-wide, so other tests' unmatched requests are subtracted
+        unmatched = http_requests_total.value("GET", "unmatched", "200")
+        await asyncio.gather(*(get(middleware) for _ in range(5)))
+        assert http_requests_total.value("GET", "/api/burst", "200") == 5
+        assert http_requests_total.value("GET", "unmatched", "200") == unmatched
+    asyncio.run(go())
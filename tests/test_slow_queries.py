@@ -0,0 +1,24 @@
+import logging
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from slow_queries import SlowQueryLog  # noqa: E402
+
+
+def test_slow_commands_are_logged_beyond_the_explain_rate_limit(caplog):
+    slow_query_log = SlowQueryLog(threshold_ms=10, explains_per_minute=0)
+    for request_id in range(3):
+        event = SimpleNamespace(
+            command_name="find", connection_id=("db", 27017), request_id=request_id,
+            database_name="test", duration_micros=50_000,
+            command={"find": "games", "filter": {"rating": request_id}},
+        )
+        slow_query_log.started(event)
+        with caplog.at_level(logging.WARNING, logger="slow_queries"):
+            slow_query_log.succeeded(event)
+    assert [record.getMessage() for record in caplog.records] == [
+        f'Slow find on test.games took 50.0 ms; filter={{"rating": {i}}}; explain=None' for i in range(3)
+    ]
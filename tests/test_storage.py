@@ -0,0 +1,120 @@
+"""
+Behaviour of the local storage engines (memory, SQLite) against the subset of
+Motor's collection API the routes rely on. Runs without MongoDB.
+"""
+
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from pymongo import DeleteOne, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from storage import open_database  # noqa: E402
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def db(request, tmp_path):
+    database = open_database(request.param, db_name="test", sqlite_path=str(tmp_path / "test.sqlite3"))
+    yield database
+    database.close()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def seed(db):
+    async def go():
+        await db.games.create_index("id", unique=True)
+        await db.games.create_index([("name", "text"), ("notes", "text")])
+        await db.games.insert_many([
+            {"id": "a", "name": "Dark Souls", "rating": 9, "platinum_status": True, "notes": "",
+             "created_at": datetime(2024, 1, 1, 0, 0, 0, 123456)},
+            {"id": "b", "name": "Kingdom Hearts", "rating": 7, "platinum_status": False, "notes": "keyblade",
+             "created_at": datetime(2024, 1, 2)},
+            {"id": "c", "name": "Halo", "rating": 8, "platinum_status": False, "notes": "",
+             "created_at": datetime(2024, 1, 3)},
+        ])
+    run(go())
+
+
+def test_find_filters_sort_and_projection(db):
+    seed(db)
+
+    async def go():
+        docs = await db.games.find({"rating": {"$gte": 8}}, {"_id": 0, "id": 1}).sort([("rating", -1)]).to_list(10)
+        assert docs == [{"id": "a"}, {"id": "c"}]
+        docs = await db.games.find({"platinum_status": False, "name": {"$regex": "^k", "$options": "i"}}).to_list(10)
+        assert [d["id"] for d in docs] == ["b"]
+        docs = await db.games.find({"$text": {"$search": "keyblade souls"}}, {"_id": 0, "id": 1}).to_list(10)
+        assert sorted(d["id"] for d in docs) == ["a", "b"]
+        docs = await db.games.find({}, {"_id": 0}).sort([("created_at", 1), ("id", 1)]).skip(1).limit(1).to_list(1)
+        assert [d["id"] for d in docs] == ["b"]
+        first = await db.games.find_one({"id": "a"}, {"_id": 0})
+        assert first["created_at"] == datetime(2024, 1, 1, 0, 0, 0, 123000)
+    run(go())
+
+
+def test_unique_index_and_bulk_errors(db):
+    seed(db)
+
+    async def go():
+        with pytest.raises(DuplicateKeyError):
+            await db.games.insert_one({"id": "a", "name": "Again"})
+        with pytest.raises(BulkWriteError) as error:
+            await db.games.bulk_write([
+                InsertOne({"id": "d", "name": "New"}),
+                InsertOne({"id": "a", "name": "Duplicate"}),
+                UpdateOne({"id": "b"}, {"$set": {"rating": 10}}),
+                DeleteOne({"id": "c"}),
+            ], ordered=False)
+        assert [e["index"] for e in error.value.details["writeErrors"]] == [1]
+        assert (await db.games.find_one({"id": "b"}))["rating"] == 10
+        assert await db.games.find_one({"id": "c"}) is None
+        assert await db.games.count_documents({}) == 3
+    run(go())
+
+
+def test_embedded_array_updates(db):
+    async def go():
+        await db.series.insert_one({"id": "s", "games": [{"id": "g1", "rating": 1}, {"id": "g2", "rating": 2}]})
+        await db.series.update_one({"id": "s"}, {"$push": {"games": {"$each": [{"id": "g3", "rating": 3}]}}})
+        member = await db.series.find_one_and_update(
+            {"id": "s", "games.id": "g2"},
+            {"$set": {"games.$.rating": 9}},
+            projection={"_id": 0, "games": {"$elemMatch": {"id": "g2"}}},
+            return_document=ReturnDocument.AFTER,
+        )
+        assert member == {"games": [{"id": "g2", "rating": 9}]}
+        result = await db.series.update_one({"id": "s", "games.id": "g1"}, {"$pull": {"games": {"id": "g1"}}})
+        assert result.modified_count == 1
+        page = await db.series.find_one({"id": "s"}, {"_id": 0, "id": 1, "games": {"$slice": [1, 5]}})
+        assert page == {"id": "s", "games": [{"id": "g3", "rating": 3}]}
+        await db.revisions.update_one({"_id": "series"}, {"$inc": {"rev": 1}}, upsert=True)
+        await db.revisions.update_one({"_id": "series"}, {"$inc": {"rev": 1}}, upsert=True)
+        assert await db.revisions.find_one({"_id": "series"}) == {"_id": "series", "rev": 2}
+    run(go())
+
+
+def test_positional_update_with_elem_match_guard(db):
+    async def go():
+        await db.series.insert_one({"id": "s", "n": 2, "games": [{"id": "g1", "rating": 1}, {"id": "g2", "rating": 2}]})
+        guard = {"id": "s", "games": {"$elemMatch": {"id": "g2", "rating": 2}}}
+        update = {"$set": {"games.$.rating": 5, "games.$.notes": "x"}, "$inc": {"n": 3}}
+        doc = await db.series.find_one_and_update(guard, update, return_document=ReturnDocument.AFTER)
+        assert doc["games"][1] == {"id": "g2", "rating": 5, "notes": "x"} and doc["n"] == 5
+        # The member no longer has the guarded value, so the same update matches nothing
+        assert await db.series.find_one_and_update(guard, update) is None
+    run(go())
+
+
+def test_dotted_inclusion_projection(db):
+    async def go():
+        await db.series.insert_one({"id": "s", "games": [{"id": "g1", "rating": 1, "notes": "x"}, {"notes": "y"}]})
+        return await db.series.find_one({"id": "s"}, {"_id": 0, "id": 1, "games.id": 1, "games.rating": 1})
+    assert run(go()) == {"id": "s", "games": [{"id": "g1", "rating": 1}, {}]}
@@ -0,0 +1,30 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from storage import open_database  # noqa: E402
+from write_behind import WriteBehindQueue  # noqa: E402
+
+
+def test_queued_writes_flush_in_batches():
+    async def go():
+        db = open_database("memory", db_name="test")
+        await db.series.insert_one({"id": "s1", "games": [], "game_count": 0})
+        flushed = []
+
+        async def on_flush(collection, *ids, operation="update"):
+            flushed.append((collection.name, operation, ids))
+
+        queue = WriteBehindQueue(max_items=3, max_delay=0.01, on_flush=on_flush)
+        inserts = [queue.insert(db.games, {"id": f"g{i}"}) for i in range(3)]
+        pushes = [queue.push(db.series, "s1", "games", {"id": f"m{i}"}, {"game_count": 1}) for i in range(2)]
+        missing = queue.push(db.series, "nope", "games", {"id": "x"})
+        assert await asyncio.gather(*inserts, *pushes, missing) == ["ok"] * 5 + ["not_found"]
+        assert await db.games.count_documents({}) == 3
+        series = await db.series.find_one({"id": "s1"})
+        assert [g["id"] for g in series["games"]] == ["m0", "m1"]
+        assert series["game_count"] == 2
+        assert flushed == [("games", "insert", ("g0", "g1", "g2")), ("series", "update", ("s1",))]
+    asyncio.run(go())